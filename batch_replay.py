@@ -0,0 +1,123 @@
+# batch_replay.py
+# 不開啟 pygame UI，直接把一或多個 joystick_recording.csv 送到 rosbridge。
+# 可用固定倍速或是連線能接受的最快速度重播，每筆樣本前會送出模擬時鐘 (/clock)。
+import argparse
+import glob
+import time
+from log import get_logger, setup_logging, shutdown_logging
+from ws_client import RosbridgeClient, publish_wheel
+from utils import load_recording, read_global_params, topic_config
+
+logger = get_logger(__name__)
+
+
+def load_replay_config(filename="config.csv"):
+    """讀取重播需要的 rosbridge port、前後輪 topic 與 cmd 範圍"""
+    try:
+        params = read_global_params(filename)
+    except Exception as e:
+        logger.error("Error loading replay config from CSV: %s", e)
+        params = {}
+    return topic_config(params)
+
+
+def clock_msg(sim_time):
+    """rosgraph_msgs/Clock 訊息"""
+    sec = int(sim_time)
+    return {"clock": {"sec": sec, "nanosec": int((sim_time - sec) * 1e9)}}
+
+
+def replay_file(ws_client, filename, config, speed=0.0, clock_topic="/clock", sim_start=0.0):
+    """
+    重播單一檔案。speed <= 0 代表不等待、以最快速度送出；否則以 speed 倍速播放。
+    回傳統計資料 dict。
+    """
+    samples = load_recording(filename)
+    sent = 0
+    failed = 0
+    start = time.perf_counter()
+    for timestamp, cmd in samples:
+        if speed > 0:
+            delay = start + timestamp / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if clock_topic:
+            if ws_client.publish(clock_topic, clock_msg(sim_start + timestamp)):
+                sent += 1
+            else:
+                failed += 1
+        if publish_wheel(ws_client, cmd,
+                         config["front_wheel_topic"],
+                         config["rear_wheel_topic"],
+                         config["front_wheel_range"],
+                         config["rear_wheel_range"]):
+            sent += 2
+        else:
+            failed += 2
+    wall = time.perf_counter() - start
+    duration = samples[-1][0] if samples else 0.0
+    return {
+        "file": filename,
+        "samples": len(samples),
+        "messages": sent,
+        "failed": failed,
+        "duration": duration,
+        "wall": wall,
+        "msgs_per_s": sent / wall if wall > 0 else float("inf"),
+        "speedup": duration / wall if wall > 0 else float("inf"),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay joystick recordings into rosbridge without the UI.")
+    parser.add_argument("files", nargs="+", help="recording CSV files (glob patterns allowed)")
+    parser.add_argument("--ip", default="127.0.0.1", help="rosbridge server IP")
+    parser.add_argument("--port", type=int, default=None, help="rosbridge port (default: config.csv)")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="playback multiple, e.g. 10 for 10x; 0 sends as fast as the link accepts")
+    parser.add_argument("--clock-topic", default="/clock",
+                        help="topic for the simulated clock stamp; empty string disables it")
+    parser.add_argument("--config", default="config.csv", help="config CSV file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_logging("INFO", filename=None)
+    config = load_replay_config(args.config)
+    port = args.port if args.port is not None else config["rosbridge_port"]
+
+    files = []
+    for pattern in args.files:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+
+    ws_client = RosbridgeClient(rosbridge_port=port)
+    if not ws_client.connect(args.ip):
+        return
+    ws_client.advertise_topic(config["rear_wheel_topic"], "std_msgs/Float32MultiArray")
+    ws_client.advertise_topic(config["front_wheel_topic"], "std_msgs/Float32MultiArray")
+    if args.clock_topic:
+        ws_client.advertise_topic(args.clock_topic, "rosgraph_msgs/Clock")
+
+    # 每個檔案的模擬時間接續在上一個檔案之後
+    sim_time = 0.0
+    total_wall = 0.0
+    for filename in files:
+        try:
+            result = replay_file(ws_client, filename, config, args.speed, args.clock_topic, sim_time)
+        except Exception as e:
+            print(f"[✘] Error replaying {filename}: {e}")
+            continue
+        sim_time += result["duration"]
+        total_wall += result["wall"]
+        print(f"[✔] {result['file']}: {result['samples']} samples, {result['messages']} msgs "
+              f"({result['failed']} failed), recording {result['duration']:.2f}s, "
+              f"wall {result['wall']:.3f}s, {result['msgs_per_s']:.0f} msg/s, x{result['speedup']:.1f}")
+
+    print(f"Total: {len(files)} files, wall {total_wall:.3f}s")
+    ws_client.disconnect()
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# calibration.py
+# 依手把 GUID 儲存的校正設定：圓形死區、外圈死區、expo 曲線與各軸中心偏移。
+# 曲線預先算成查表 (lookup table)，每個樣本只需要計算長度並查一次表。
+#
+# controller_profiles.csv 格式（含表頭）：
+#   guid,param,value1,value2
+#   default,deadzone,0.1,
+#   030000004c050000e60c000000016800,name,DualSense,
+#   030000004c050000e60c000000016800,deadzone,0.06,
+#   030000004c050000e60c000000016800,outer,0.97,
+#   030000004c050000e60c000000016800,expo,0.3,
+#   030000004c050000e60c000000016800,center,0,0.012      (axis 0 的中心偏移)
+# 找不到對應 GUID 時使用 guid 為 "default" 的設定（預設檔案不附），兩者都沒有時改用 config.csv 的 min_joystick_value。
+import csv
+import math
+import numpy as np
+from log import get_logger
+
+logger = get_logger(__name__)
+
+PROFILES_FILE = "controller_profiles.csv"
+DEFAULT_GUID = "default"
+
+# 查表涵蓋的長度範圍：兩軸同時推到底時長度約為 1.414
+LUT_MAX = 1.5
+
+
+class CalibrationProfile:
+    def __init__(self, guid, name="", deadzone=0.1, outer=1.0, expo=0.0, centers=None, resolution=1024):
+        self.guid = guid
+        self.name = name
+        self.deadzone = deadzone
+        self.outer = outer
+        self.expo = expo
+        self.centers = dict(centers or {})   # axis index -> 中心偏移
+        self.resolution = resolution
+        self.build_lut()
+
+    def response(self, magnitude):
+        """長度 -> 輸出長度（0~1），numpy 陣列運算"""
+        span = max(self.outer - self.deadzone, 1e-6)
+        u = np.clip((magnitude - self.deadzone) / span, 0.0, 1.0)
+        return (1.0 - self.expo) * u + self.expo * u ** 3
+
+    def build_lut(self):
+        """預先計算每個長度對應的縮放倍率（輸出長度 / 輸入長度）"""
+        magnitude = np.linspace(0.0, LUT_MAX, self.resolution + 1)
+        scale = np.zeros_like(magnitude)
+        nonzero = magnitude > 0
+        scale[nonzero] = self.response(magnitude[nonzero]) / magnitude[nonzero]
+        # Python list 做單一元素索引比 numpy 陣列快
+        self.lut = scale.tolist()
+        self._index_scale = self.resolution / LUT_MAX
+
+    def apply_stick(self, x, y, axis_x, axis_y):
+        """對一支搖桿的兩個軸做中心校正與圓形死區/曲線，回傳 (x, y)"""
+        x -= self.centers.get(axis_x, 0.0)
+        y -= self.centers.get(axis_y, 0.0)
+        index = int(math.sqrt(x * x + y * y) * self._index_scale)
+        scale = self.lut[index if index <= self.resolution else self.resolution]
+        return x * scale, y * scale
+
+    def rows(self):
+        rows = [[self.guid, "name", self.name, ""]] if self.name else []
+        rows += [
+            [self.guid, "deadzone", self.deadzone, ""],
+            [self.guid, "outer", self.outer, ""],
+            [self.guid, "expo", self.expo, ""],
+        ]
+        rows += [[self.guid, "center", axis, offset] for axis, offset in sorted(self.centers.items())]
+        return rows
+
+
+def load_profiles(filename=PROFILES_FILE):
+    """回傳 {guid: CalibrationProfile}"""
+    params = {}
+    try:
+        with open(filename, newline="") as f:
+            for row in csv.DictReader(f):
+                entry = params.setdefault(row["guid"], {"centers": {}})
+                if row["param"] == "center":
+                    entry["centers"][int(row["value1"])] = float(row["value2"])
+                elif row["param"] == "name":
+                    entry["name"] = row["value1"]
+                elif row["param"] in ("deadzone", "outer", "expo"):
+                    entry[row["param"]] = float(row["value1"])
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error("Error loading controller profiles: %s", e)
+        return {}
+    return {guid: CalibrationProfile(guid, **entry) for guid, entry in params.items()}
+
+
+def save_profile(profile, filename=PROFILES_FILE):
+    """新增或取代檔案中同 GUID 的設定"""
+    profiles = load_profiles(filename)
+    profiles[profile.guid] = profile
+    try:
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["guid", "param", "value1", "value2"])
+            for saved in profiles.values():
+                writer.writerows(saved.rows())
+        logger.info("Saved profile for %s to %s", profile.guid, filename)
+    except OSError as e:
+        logger.error("Error saving controller profile: %s", e)
+
+
+def find_profile(profiles, guid):
+    return profiles.get(guid) or profiles.get(DEFAULT_GUID)
@@ -0,0 +1,219 @@
+# command_server.py
+# 本機指令注入端點：外部程式（自動駕駛腳本、測試工具）把輪子/手臂指令以精簡的二進位封包
+# 送進來，透過和手把相同的 rosbridge 連線發送。實體手把有操作時永遠優先。
+#
+# 封包格式（little-endian）：
+#   uint8 kind (1 = 輪子, 2 = 手臂), uint8 count, float32 * count
+# 傳輸方式：支援 AF_UNIX 的系統用 Unix domain datagram socket，否則用 127.0.0.1 上的 UDP。
+import argparse
+import errno
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from log import get_logger
+
+logger = get_logger(__name__)
+
+KIND_WHEEL = 1
+KIND_ARM = 2
+WHEEL_COUNT = 4   # frontLeft, frontRight, rearLeft, rearRight
+
+HEADER = struct.Struct("<BB")
+DEFAULT_ADDRESS = "/tmp/pros_ps5_cmd.sock" if hasattr(socket, "AF_UNIX") else "udp:47100"
+MAX_PACKET = HEADER.size + 255 * 4
+
+
+def encode_command(kind, values):
+    return HEADER.pack(kind, len(values)) + struct.pack(f"<{len(values)}f", *values)
+
+
+def decode_command(data, max_arm_values=255):
+    """
+    回傳 (kind, [values])，格式不符時回傳 None。
+    輪子指令必須剛好 4 個值，手臂指令最多 max_arm_values 個；含 NaN/inf 的封包一律丟棄。
+    """
+    if len(data) < HEADER.size:
+        return None
+    kind, count = HEADER.unpack_from(data)
+    if len(data) != HEADER.size + count * 4:
+        return None
+    if kind == KIND_WHEEL:
+        if count != WHEEL_COUNT:
+            return None
+    elif kind == KIND_ARM:
+        if count == 0 or count > max_arm_values:
+            return None
+    else:
+        return None
+    values = list(struct.unpack_from(f"<{count}f", data, HEADER.size))
+    if not all(math.isfinite(v) for v in values):
+        return None
+    return kind, values
+
+
+def _socket_in_use(path):
+    """path 上是否有其他程式正在接收（留下的舊 socket 檔案連不上）"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def _open_socket(address, bind):
+    """address 為 Unix socket 路徑或 "udp:<port>"，回傳 (socket, 目的地址)"""
+    if not address.startswith("udp:") and not hasattr(socket, "AF_UNIX"):
+        logger.warning("Unix sockets are not supported here, using %s instead of %s", DEFAULT_ADDRESS, address)
+        address = DEFAULT_ADDRESS
+    if address.startswith("udp:"):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        target = ("127.0.0.1", int(address[4:]))
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        target = address
+        if bind and os.path.exists(address):
+            if _socket_in_use(address):
+                sock.close()
+                raise OSError(errno.EADDRINUSE, "already in use by another running instance", address)
+            os.remove(address)
+    if bind:
+        sock.bind(target)
+    return sock, target
+
+
+class CommandServer:
+    """
+    背景執行緒接收封包，每種指令只保留最新的一筆（高頻率送入時自動合併），
+    主迴圈每個 frame 用 take() 以非阻塞方式取出。
+    """
+    def __init__(self, address=DEFAULT_ADDRESS, arm_joints=255):
+        self.address = address
+        self.arm_joints = arm_joints
+        self.sock = None
+        self.received = 0
+        self.dropped = 0
+        self._latest = {}        # kind -> (values, 收到時間)
+        self._new = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        try:
+            self.sock, _ = _open_socket(self.address, bind=True)
+            self.sock.settimeout(0.5)
+        except OSError as e:
+            logger.error("Failed to open command endpoint %s: %s", self.address, e)
+            self.sock = None
+            return False
+        self._thread = threading.Thread(target=self._run, name="command-server", daemon=True)
+        self._thread.start()
+        logger.info("Command endpoint listening on %s", self.address)
+        return True
+
+    def stop(self):
+        if self.sock is None:
+            return
+        sock, self.sock = self.sock, None
+        sock.close()
+        if not self.address.startswith("udp:") and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def _run(self):
+        sock = self.sock
+        while self.sock is sock:
+            try:
+                data = sock.recv(MAX_PACKET)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            command = decode_command(data, self.arm_joints)
+            if command is None:
+                self.dropped += 1
+                continue
+            kind, values = command
+            with self._lock:
+                self._latest[kind] = (values, time.time())
+                self._new.add(kind)
+            self.received += 1
+
+    def take(self, kind):
+        """取出尚未處理的最新指令，沒有新指令時回傳 None"""
+        if kind not in self._new:
+            return None
+        with self._lock:
+            self._new.discard(kind)
+            return self._latest[kind][0]
+
+    def active(self, kind, timeout):
+        """timeout 秒內是否收到過這種指令"""
+        latest = self._latest.get(kind)
+        return latest is not None and time.time() - latest[1] < timeout
+
+
+class CommandArbiter:
+    """
+    仲裁實體手把與外部指令：手把在 manual_hold 秒內有操作時忽略外部指令；
+    外部指令在 command_timeout 秒內持續送入時，手把靜止的輸出（全 0）不會覆蓋它。
+    """
+    def __init__(self, server, manual_hold=0.5, command_timeout=0.5):
+        self.server = server
+        self.manual_hold = manual_hold
+        self.command_timeout = command_timeout
+
+    def manual_active(self, last_manual_input, now=None):
+        now = time.time() if now is None else now
+        return now - last_manual_input < self.manual_hold
+
+    def external_owns(self, kind, last_manual_input, now=None):
+        return (not self.manual_active(last_manual_input, now)
+                and self.server.active(kind, self.command_timeout))
+
+    def take(self, kind, last_manual_input, now=None):
+        """手把沒有操作時取出外部指令，否則丟棄"""
+        values = self.server.take(kind)
+        if values is None or self.manual_active(last_manual_input, now):
+            return None
+        return values
+
+
+class CommandClient:
+    """給外部程式使用的傳送端"""
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.sock, self.target = _open_socket(address, bind=False)
+
+    def send_wheel(self, speeds):
+        self.sock.sendto(encode_command(KIND_WHEEL, speeds), self.target)
+
+    def send_arm(self, positions):
+        """positions 為目前模式下的關節角度（弧度）"""
+        self.sock.sendto(encode_command(KIND_ARM, positions), self.target)
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a command to the running controller app.")
+    parser.add_argument("kind", choices=["wheel", "arm"])
+    parser.add_argument("values", type=float, nargs="+",
+                        help="wheel: frontLeft frontRight rearLeft rearRight; arm: joint angles in radians")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help="Unix socket path or udp:<port>")
+    args = parser.parse_args()
+    client = CommandClient(args.address)
+    if args.kind == "wheel":
+        client.send_wheel(args.values)
+    else:
+        client.send_arm(args.values)
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
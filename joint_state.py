@@ -0,0 +1,81 @@
+# joint_state.py
+# 手臂關節狀態：角度、上下限與 Unity offset 都存成連續的 numpy 陣列（弧度），
+# 一般模式與 Unity 模式的上下限預先算好，clip / 模式切換都是一次陣列運算。
+import math
+import numpy as np
+
+REAL = 0
+UNITY = 1
+
+
+def _pad(values, count, fill):
+    """把 list 補齊或截斷到 count 個元素"""
+    values = list(values)[:count]
+    return values + [fill] * (count - len(values))
+
+
+class JointState:
+    def __init__(self, count, joint_limits=None, joint_limits_unity=None, unity_offset_deg=None):
+        """
+        joint_limits / joint_limits_unity：[(lower_rad, upper_rad), ...]
+        unity_offset_deg：Unity 模式相對於一般模式的角度差（度）
+        """
+        default_limit = (0.0, math.radians(180))
+        self.count = count
+        limits = np.array([
+            _pad(joint_limits or [], count, default_limit),
+            _pad(joint_limits_unity or [], count, default_limit),
+        ], dtype=float)
+        # shape (2, count)，第一維為模式 REAL / UNITY
+        self.lower = np.ascontiguousarray(limits[:, :, 0])
+        self.upper = np.ascontiguousarray(limits[:, :, 1])
+        offset = np.radians(np.array(_pad(unity_offset_deg or [], count, 0.0), dtype=float))
+        # 每個模式要加在一般模式角度上的 offset
+        self.mode_offset = np.stack([np.zeros(count), offset])
+        self.mode = REAL
+        # 目前模式下實際送出的角度，以及 UI 顯示用（換回一般模式）的角度
+        self.angles = np.zeros(count)
+        self.display = np.zeros(count)
+
+    def _update_display(self):
+        np.subtract(self.angles, self.mode_offset[self.mode], out=self.display)
+
+    def clip(self):
+        np.clip(self.angles, self.lower[self.mode], self.upper[self.mode], out=self.angles)
+        self._update_display()
+
+    def set_mode(self, unity):
+        """切換模式，角度一次加上/扣除兩個模式之間的 offset"""
+        mode = UNITY if unity else REAL
+        if mode == self.mode:
+            return
+        self.angles += self.mode_offset[mode] - self.mode_offset[self.mode]
+        self.mode = mode
+        self._update_display()
+
+    def step(self, index, delta):
+        self.angles[index] += delta
+        self.clip()
+
+    def convert(self, degrees):
+        """
+        把一般模式的角度（度）換成每個模式下限制後的角度，回傳 shape (2, count) 的陣列。
+        """
+        real = np.radians(np.array(_pad(degrees, self.count, 0.0), dtype=float))
+        return np.clip(real + self.mode_offset, self.lower, self.upper)
+
+    def load(self, converted):
+        """載入 convert() 的結果中目前模式的那一列"""
+        np.copyto(self.angles, converted[self.mode])
+        self._update_display()
+
+    def set_degrees(self, degrees):
+        """以一般模式的角度（度）設定目前姿勢"""
+        self.load(self.convert(degrees))
+
+    def real_degrees(self):
+        """目前姿勢換回一般模式的角度（度）"""
+        return np.degrees(self.display)
+
+    def positions(self):
+        return self.angles.tolist()
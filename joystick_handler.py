@@ -2,19 +2,25 @@ import pygame
 import time
 import math
 import csv
-from utils import map_trigger_value, vel_limit, angle_limit
+import logging
+from calibration import PROFILES_FILE, find_profile, load_profiles
+from joint_state import JointState
+from log import get_logger
+from utils import map_trigger_value, vel_limit, angle_limit, load_recording, parse_range
+
+logger = get_logger(__name__)
 
 class JoystickHandler:
     def __init__(self):
         
         pygame.joystick.init()
         if pygame.joystick.get_count() == 0:
-            print("No joystick detected.")
+            logger.warning("No joystick detected.")
             self.joystick = None
         else:
             self.joystick = pygame.joystick.Joystick(0)
             self.joystick.init()  # 初始化搖桿
-            print(f"Detected Joystick: {self.joystick.get_name()}")
+            logger.info("Detected Joystick: %s", self.joystick.get_name())
 
         # 搖桿錄製用
         self.recording_enabled = False
@@ -31,8 +37,6 @@ class JoystickHandler:
         # 預設值
         self.velocity = 10.0
         self.arm_joints_count = 7 # 手臂數量
-        self.arm_angles = [0.0] * self.arm_joints_count
-        self.arm_realangles = [0.0] * self.arm_joints_count
         self.arm_angles_Unity_offset = [10, -60, -70, -90, -90, -90,-70]
         self.joint_limits = [(0.0, math.radians(180)) for _  in range(self.arm_joints_count)]
         self.joint_limits_unity = [(0.0, math.radians(180)) for _  in range(self.arm_joints_count)]
@@ -77,18 +81,41 @@ class JoystickHandler:
         self.isUnityButton = 9
         self.isUnity = False
 
+        # 姿勢庫：按住 pose_button 再按另一個鍵叫出姿勢，按住 capturePose_button 再按鍵則把目前角度存成該鍵的姿勢
+        # 未設定 pose_button 時，姿勢直接綁定在單一按鍵上
+        self.pose_button = None
+        self.capturePose_button = None
+        self.pose_rows = []        # CSV 中的 (name, 角度(度), 綁定按鍵)
+        self.poses = {}            # name -> (每個模式限制後的角度陣列, {isUnity: arm_msg})
+        self.pose_bindings = {}    # 綁定按鍵 -> name
+        self.held_buttons = set()
+        self.config_filename = "config.csv"
+
         self.wheel_speed = [0, 0, 0, 0] #wheel speed for gui
+        self.last_axes = (0, 0, 0) #axis_horizontal, axis_vertical, axis_rotational for telemetry
+
+        # 最後一次實體手把操作的時間，外部指令仲裁用
+        self.last_manual_input = 0.0
 
         #minimal joystick value to prevent drifting
         self.min_joystick_value = 0.1
 
+        # 依手把 GUID 的校正設定（沒有對應設定時使用 min_joystick_value）
+        self.controller_profiles_file = PROFILES_FILE
+        self.joystick_profiles = {}  # instance id -> CalibrationProfile
+
 
         # 從 CSV 載入設定
         self.load_config("config.csv")
 
+        # 關節角度、上下限與 Unity offset 的陣列
+        self.build_joint_state()
+
+        # 預先換算並限制所有姿勢（含重設角度）
+        self.build_poses()
+
         # 先在進去後重設所有手臂角度，不然角度都會為0
-        self.arm_realangles = [math.radians(deg) for deg in self.reset_arm_angle]
-        self.clip_arm_angles()
+        self.joint_state.load(self.poses["reset"][0])
 
     def load_config(self, filename="config.csv"):
         """
@@ -131,13 +158,17 @@ class JoystickHandler:
         global,previousArm_button,0,
         global,armAngleStepDegPlus_button,11,
         global,armAngleStepDegMinus_button,12,
+        global,pose_button,15,
+        pose,home,"80, 10, 160, 90, 90, 90, 70",0
         """
+        self.config_filename = filename
         try:
             with open(filename, "r", newline='') as f:
                 reader = csv.DictReader(f)
                 global_params = {}
                 joint_rows = []
                 jointunity_rows = [] 
+                self.pose_rows = []
                 for row in reader:
                     if row["type"] == "global":
                         global_params[row["param"]] = row["value1"]
@@ -145,6 +176,10 @@ class JoystickHandler:
                         joint_rows.append(row)
                     elif row["type"] == "jointunity":
                         jointunity_rows.append(row)
+                    elif row["type"] == "pose":
+                        degrees = [float(x.strip()) for x in row["value1"].split(",")]
+                        binding = int(row["value2"]) if row["value2"] else None
+                        self.pose_rows.append((row["param"], degrees, binding))
             # 全域參數讀取
             if "joints_count" in global_params:
                 self.arm_joints_count = int(global_params["joints_count"])
@@ -159,11 +194,7 @@ class JoystickHandler:
             if "rear_wheel_topic" in global_params and global_params["rear_wheel_topic"]:
                 self.rear_wheel_topic = global_params["rear_wheel_topic"]
             if "front_wheel_range" in global_params:
-                try:
-                    parts = global_params["front_wheel_range"].split("-")
-                    self.front_wheel_range = (int(parts[0]), int(parts[1]))
-                except:
-                    self.front_wheel_range = (0, 2)
+                self.front_wheel_range = parse_range(global_params["front_wheel_range"], (0, 2))
             #新的讀取角度預設值
             if "reset_arm_angle" in global_params and global_params["reset_arm_angle"]:
                 val = global_params["reset_arm_angle"]
@@ -179,11 +210,7 @@ class JoystickHandler:
             # else:
             #     self.reset_arm_angle = 0.0
             if "rear_wheel_range" in global_params:
-                try:
-                    parts = global_params["rear_wheel_range"].split("-")
-                    self.rear_wheel_range = (int(parts[0]), int(parts[1]))
-                except:
-                    self.rear_wheel_range = (2, 4)
+                self.rear_wheel_range = parse_range(global_params["rear_wheel_range"], (2, 4))
             
             if "left_stick_horizontal" in global_params:
                 self.left_stick_horizontal = int (global_params["left_stick_horizontal"])
@@ -195,6 +222,8 @@ class JoystickHandler:
                 self.right_stick_vertical = int (global_params["right_stick_vertical"])
             if "min_joystick_value" in global_params:
                 self.min_joystick_value = float (global_params["min_joystick_value"])
+            if global_params.get("controller_profiles"):
+                self.controller_profiles_file = global_params["controller_profiles"]
 
             #角度變化預設值
             if "angle_step_deg_change" in global_params:
@@ -230,6 +259,10 @@ class JoystickHandler:
                 self.armAngleStepDegMinus_button = int(global_params["armAngleStepDegMinus_button"])
             if "isUnityButton" in global_params:
                 self.isUnityButton = int(global_params["isUnityButton"])
+            if global_params.get("pose_button"):
+                self.pose_button = int(global_params["pose_button"])
+            if global_params.get("capturePose_button"):
+                self.capturePose_button = int(global_params["capturePose_button"])
             if "arm_angles_Unity_offset" in global_params and global_params["arm_angles_Unity_offset"]:
                 val = global_params["arm_angles_Unity_offset"]
                 if isinstance(val, str) and "," in val:
@@ -259,47 +292,136 @@ class JoystickHandler:
                     self.joint_limits.append((math.radians(lower_deg), math.radians(upper_deg)))
                 else:
                     self.joint_limits.append((0.0, math.radians(180)))
-            self.arm_realangles = [0.0] * self.arm_joints_count
             self.arm_index = 0
-            print(f"Loaded config: {self.arm_joints_count} joints, angle step {self.angle_step_deg} deg, speed step {self.speed_incr},")
-            print(f"arm topic: {self.arm_topic}, front wheel topic: {self.front_wheel_topic}, rear wheel topic: {self.rear_wheel_topic}")
-            print(f"front wheel range: {self.front_wheel_range}, rear wheel range: {self.rear_wheel_range}")
+            logger.info("Loaded config: %d joints, angle step %s deg, speed step %s",
+                        self.arm_joints_count, self.angle_step_deg, self.speed_incr)
+            logger.info("arm topic: %s, front wheel topic: %s, rear wheel topic: %s",
+                        self.arm_topic, self.front_wheel_topic, self.rear_wheel_topic)
+            logger.info("front wheel range: %s, rear wheel range: %s", self.front_wheel_range, self.rear_wheel_range)
         except FileNotFoundError:
-            print(f"Config CSV '{filename}' not found, using defaults.")
+            logger.warning("Config CSV '%s' not found, using defaults.", filename)
         except Exception as e:
-            print("Error loading config CSV:", e)
+            logger.error("Error loading config CSV: %s", e)
+
+    @property
+    def arm_realangles(self):
+        """目前模式下送出的關節角度（弧度）"""
+        return self.joint_state.angles
+
+    @property
+    def arm_angles(self):
+        """UI 顯示用的關節角度（換回一般模式，弧度）"""
+        return self.joint_state.display
+
+    def build_joint_state(self):
+        offset = self.arm_angles_Unity_offset
+        if not isinstance(offset, list):
+            offset = [offset] * self.arm_joints_count
+        self.joint_state = JointState(self.arm_joints_count, self.joint_limits,
+                                      self.joint_limits_unity, offset)
+        self.joint_state.set_mode(self.isUnity)
 
     def clip_arm_angles(self):
         """將各關節角度限制在上下限之間（弧度）"""
-        if self.isUnity:
-            for i in range(self.arm_joints_count):
-                lower, upper = self.joint_limits_unity[i]
-                self.arm_realangles[i] = max(lower, min(self.arm_realangles[i], upper))
-                print("Joint" + str([i]) + " : " + str(self.arm_realangles[i]))
-                print("CSVJoint" + str([i]) + " : " + str(self.joint_limits_unity[i]))
+        self.joint_state.clip()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Clipped joints", extra={"angles": self.joint_state.positions()})
+
+    def add_pose(self, name, degrees, binding=None):
+        """
+        將姿勢（一般模式下的角度，單位度）預先換算成弧度，
+        分別對一般與 Unity 的關節上下限做限制，之後叫出時只需一次 publish。
+        """
+        converted = self.joint_state.convert(degrees)
+        self.poses[name] = (converted, {
+            False: {"positions": converted[0].tolist()},
+            True: {"positions": converted[1].tolist()},
+        })
+        if binding is not None:
+            self.pose_bindings[binding] = name
+
+    def build_poses(self):
+        """由 reset_arm_angle 與 CSV 的 pose 列建立姿勢庫"""
+        self.poses = {}
+        self.pose_bindings = {}
+        if isinstance(self.reset_arm_angle, list):
+            self.add_pose("reset", self.reset_arm_angle)
         else:
-            for i in range(self.arm_joints_count):
-                lower, upper = self.joint_limits[i]
-                self.arm_realangles[i] = max(lower, min(self.arm_realangles[i], upper))
-                print("Joint" + str([i]) + " : " + str(self.arm_realangles[i]))
-                print("CSVJoint" + str([i]) + " : " + str(self.joint_limits[i]))
+            self.add_pose("reset", [self.reset_arm_angle] * self.arm_joints_count)
+        for name, degrees, binding in self.pose_rows:
+            self.add_pose(name, degrees, binding)
+
+    def recall_pose(self, name, arm_publish_callback):
+        """叫出預先計算好的姿勢"""
+        converted, arm_msgs = self.poses[name]
+        self.joint_state.load(converted)
+        arm_publish_callback(arm_msgs[self.isUnity])
+
+    def function_buttons(self):
+        """已經有固定功能的按鍵"""
+        return {
+            self.front_button, self.back_button, self.left_button, self.right_button, self.stop_button,
+            self.resetArm_button, self.isUnityButton, self.deceleration_button, self.acceleration_button,
+            self.armAnglePlus_button, self.armAngleMinus_button, self.nextArm_button, self.previousArm_button,
+            self.armAngleStepDegPlus_button, self.armAngleStepDegMinus_button,
+        }
+
+    def capture_pose(self, binding):
+        """把目前的手臂角度存成綁定在 binding 按鍵的姿勢，並寫回 CSV（同一個按鍵只保留一列）"""
+        # 沒有 pose_button 組合鍵時，姿勢直接綁在按鍵上，會蓋掉原本的功能
+        if self.pose_button is None and binding in self.function_buttons():
+            logger.warning("[✘] Button %s already has a function; set pose_button to capture poses on it", binding)
+            return
+        degrees = [round(float(d), 2) for d in self.joint_state.real_degrees()]
+        name = self.pose_bindings.get(binding, f"captured_{binding}")
+        self.add_pose(name, degrees, binding)
+        self.pose_rows = [r for r in self.pose_rows if r[2] != binding] + [(name, degrees, binding)]
+        row = ["pose", name, ", ".join(str(d) for d in degrees), binding]
+        try:
+            with open(self.config_filename, mode="r", newline="") as f:
+                lines = f.readlines()
+            for i, line in enumerate(lines):
+                fields = next(csv.reader([line]), [])
+                if len(fields) >= 4 and fields[0] == "pose" and fields[3].strip() == str(binding):
+                    lines[i] = self._csv_line(row)
+                    break
+            else:
+                if lines and not lines[-1].endswith("\n"):
+                    lines[-1] += "\n"
+                lines.append(self._csv_line(row))
+            with open(self.config_filename, mode="w", newline="") as f:
+                f.writelines(lines)
+            logger.info("[✔] Pose '%s' captured on button %s", name, binding)
+        except Exception as e:
+            logger.error("[✘] Error saving pose: %s", e)
+
+    @staticmethod
+    def _csv_line(row):
+        return ",".join(f'"{v}"' if "," in str(v) else str(v) for v in row) + "\n"
+
+    def process_button_release(self, button):
+        self.held_buttons.discard(button)
 
     def set_joint_count(self, count):
         """指定關節數量（不從檔案時使用）"""
         self.arm_joints_count = count
-        self.arm_realangles = [0.0] * count
         self.joint_limits = [(0.0, math.radians(180)) for _ in range(count)]
+        self.build_joint_state()
+        self.build_poses()
         self.arm_index = 0
 
     def changeAngleWhenUnity(self):
-        if self.isUnity:
-            for i in range(len(self.arm_realangles)):
-                self.arm_realangles[i] += math.radians(self.arm_angles_Unity_offset[i])
-        else:
-            for i in range(len(self.arm_realangles)):
-                self.arm_realangles[i] -= math.radians(self.arm_angles_Unity_offset[i])
+        self.joint_state.set_mode(self.isUnity)
+
+    def apply_external_arm(self, positions, arm_publish_callback):
+        """外部注入的手臂角度（目前模式，弧度），限制在上下限內後發送"""
+        count = min(len(positions), self.arm_joints_count)
+        self.joint_state.angles[:count] = positions[:count]
+        self.clip_arm_angles()
+        arm_publish_callback({"positions": self.joint_state.positions()})
 
     def process_hat_press(self, hat, wheel_publish_callback):
+        self.last_manual_input = time.time()
         if hat == (0, 1): # 前進
             finalWheelSpeed = [self.velocity, self.velocity, self.velocity, self.velocity]
         elif hat == (0, -1):  # 後退
@@ -310,6 +432,18 @@ class JoystickHandler:
         self.wheel_speed = finalWheelSpeed
      
     def process_button_press(self, button, wheel_publish_callback, arm_publish_callback):
+        self.last_manual_input = time.time()
+        # 姿勢庫：修飾鍵本身不觸發其他動作
+        if button == self.pose_button or button == self.capturePose_button:
+            self.held_buttons.add(button)
+            return
+        if self.capturePose_button in self.held_buttons:
+            self.capture_pose(button)
+            return
+        if button in self.pose_bindings and (self.pose_button is None or self.pose_button in self.held_buttons):
+            self.recall_pose(self.pose_bindings[button], arm_publish_callback)
+            return
+
         # 轉換步進角度為弧度
         step_radians = math.radians(self.angle_step_deg)
 
@@ -324,21 +458,12 @@ class JoystickHandler:
         elif button == self.stop_button:   # 停止
             wheel_publish_callback([0.0, 0.0, 0.0, 0.0])
         elif button == self.resetArm_button:   # Start鍵：重設所有手臂角度為 CSV 設定的值
-            self.arm_realangles = [math.radians(deg) for deg in self.reset_arm_angle]
-            if self.isUnity:
-                for i in range(len(self.arm_realangles)):
-                    self.arm_realangles[i] += math.radians(self.arm_angles_Unity_offset[i])
-            self.clip_arm_angles()
-            arm_publish_callback({"positions": self.arm_realangles})
+            self.recall_pose("reset", arm_publish_callback)
+            return
         elif button == self.isUnityButton:
             self.isUnity = not self.isUnity
-            if self.isUnity:
-                for i in range(len(self.arm_realangles)):
-                    self.arm_realangles[i] += math.radians(self.arm_angles_Unity_offset[i])
-            else:
-                for i in range(len(self.arm_realangles)):
-                    self.arm_realangles[i] -= math.radians(self.arm_angles_Unity_offset[i])
-            print(self.isUnity)
+            self.changeAngleWhenUnity()
+            logger.info("Unity mode: %s", self.isUnity)
             #下面是原本的代碼，會把所有手臂角度轉成CSV設定的值，不過應該可能只能設定一個
             #reset_val = math.radians(self.reset_arm_angle)
             #self.arm_angles = [reset_val] * self.arm_joints_count
@@ -351,15 +476,13 @@ class JoystickHandler:
             self.velocity += self.speed_incr
             self.velocity = vel_limit(self.velocity)
         elif button == self.armAnglePlus_button:   # B：增加當前關節角度
-            self.arm_realangles[self.arm_index] += step_radians
-            self.clip_arm_angles()
-            arm_publish_callback({"positions": self.arm_realangles})
-            print("position = " + str(self.arm_realangles[self.arm_index]))
+            self.joint_state.step(self.arm_index, step_radians)
+            arm_publish_callback({"positions": self.joint_state.positions()})
+            logger.debug("position = %s", self.arm_realangles[self.arm_index])
         elif button == self.armAngleMinus_button:   # X：減少當前關節角度
-            self.arm_realangles[self.arm_index] -= step_radians
-            self.clip_arm_angles()
-            arm_publish_callback({"positions": self.arm_realangles})
-            print("position = " + str(self.arm_realangles[self.arm_index]))
+            self.joint_state.step(self.arm_index, -step_radians)
+            arm_publish_callback({"positions": self.joint_state.positions()})
+            logger.debug("position = %s", self.arm_realangles[self.arm_index])
         elif button == self.previousArm_button:   # Y：上一個關節
             self.arm_index = max(self.arm_index - 1, 0)
         elif button == self.nextArm_button:   # A：下一個關節
@@ -370,14 +493,6 @@ class JoystickHandler:
         elif button == self.armAngleStepDegMinus_button:   # L3：減少角度步進值
             self.angle_step_deg -= self.angle_step_deg_change
             self.angle_step_deg = angle_limit(self.angle_step_deg)
-
-        if self.isUnity:
-            for i in range(len(self.arm_realangles)):
-                self.arm_angles[i] = self.arm_realangles[i]
-                self.arm_angles[i] -= math.radians(self.arm_angles_Unity_offset[i])
-        else:
-            for i in range(len(self.arm_realangles)):
-                self.arm_angles[i] = self.arm_realangles[i]
         time.sleep(0.01)
 
     def process_axis_motion(self, axis, value, wheel_publish_callback):
@@ -386,13 +501,37 @@ class JoystickHandler:
             # 如需要，可根據 mapped_value 更新 self.velocity
             # self.velocity = mapped_value        
 
-    def process_joystick_continous(self, joysticks, wheel_publish_callback):
-        for joystick in joysticks.values():
-
-            axis_vertical = 0
-            axis_horizontal = 0
-            axis_rotational = 0
-
+    def attach_profile(self, joystick):
+        """手把連線 (JOYDEVICEADDED) 時載入對應 GUID 的校正設定"""
+        profiles = load_profiles(self.controller_profiles_file)
+        profile = find_profile(profiles, joystick.get_guid())
+        if profile is None:
+            logger.info("No calibration profile for %s, using min_joystick_value", joystick.get_guid())
+            return
+        self.joystick_profiles[joystick.get_instance_id()] = profile
+        logger.info("Calibration profile '%s' loaded for joystick %s",
+                    profile.name or profile.guid, joystick.get_instance_id())
+
+    def detach_profile(self, instance_id):
+        self.joystick_profiles.pop(instance_id, None)
+
+    def read_sticks(self, instance_id, joystick):
+        """讀取一支手把經過死區/校正後的 (axis_horizontal, axis_vertical, axis_rotational)"""
+        axis_vertical = 0
+        axis_horizontal = 0
+        axis_rotational = 0
+
+        profile = self.joystick_profiles.get(instance_id)
+        if profile is not None:
+            # 圓形死區與曲線：查表取得縮放倍率
+            axis_horizontal, axis_vertical = profile.apply_stick(
+                joystick.get_axis(self.left_stick_horizontal), joystick.get_axis(self.left_stick_vertical),
+                self.left_stick_horizontal, self.left_stick_vertical)
+            axis_vertical = -axis_vertical
+            axis_rotational, _ = profile.apply_stick(
+                joystick.get_axis(self.right_stick_horizontal), joystick.get_axis(self.right_stick_vertical),
+                self.right_stick_horizontal, self.right_stick_vertical)
+        else:
             #get left stick horizontal axis
             if abs(joystick.get_axis(self.left_stick_horizontal)) > self.min_joystick_value:
                 axis_horizontal = joystick.get_axis(self.left_stick_horizontal)
@@ -402,6 +541,16 @@ class JoystickHandler:
             #get right stick horizontal axis
             if abs(joystick.get_axis(self.right_stick_horizontal)) > self.min_joystick_value:
                 axis_rotational = joystick.get_axis(self.right_stick_horizontal)
+        return axis_horizontal, axis_vertical, axis_rotational
+
+    def sticks_moved(self, joysticks):
+        """任何一支手把的搖桿輸出是否不在中心（死區內的雜訊不算）"""
+        return any(any(self.read_sticks(instance_id, joystick)) for instance_id, joystick in joysticks.items())
+
+    def process_joystick_continous(self, joysticks, wheel_publish_callback):
+        for instance_id, joystick in joysticks.items():
+
+            axis_horizontal, axis_vertical, axis_rotational = self.read_sticks(instance_id, joystick)
 
             frontLeft = axis_vertical + axis_horizontal + axis_rotational
             frontRight = axis_vertical - axis_horizontal - axis_rotational        
@@ -409,6 +558,9 @@ class JoystickHandler:
             rearRight = axis_vertical + axis_horizontal - axis_rotational
 
             finalWheelSpeed = [frontLeft * self.velocity, frontRight * self.velocity, rearLeft * self.velocity, rearRight * self.velocity]
+            self.last_axes = (axis_horizontal, axis_vertical, axis_rotational)
+            if axis_horizontal or axis_vertical or axis_rotational:
+                self.last_manual_input = time.time()
             wheel_publish_callback(finalWheelSpeed)
             self.wheel_speed = finalWheelSpeed
 
@@ -442,22 +594,20 @@ class JoystickHandler:
                                 "frontLeft", "frontRight", "rearLeft", "rearRight"])
                 for row in self.recorded_data:
                     writer.writerow(row)
-            print(f"[✔] Joystick recording saved to {filename}")
+            logger.info("[✔] Joystick recording saved to %s", filename)
         except Exception as e:
-            print("[✘] Error saving recording:", e)
+            logger.error("[✘] Error saving recording: %s", e)
 
     def start_replay(self, filename, wheel_publish_callback):
         try:
-            with open(filename, mode="r") as f:
-                reader = csv.DictReader(f)
-                self.replay_data = list(reader)
+            self.replay_data = load_recording(filename)
             self.replaying = True
             self.replay_start_time = time.time()
             self._replay_index = 0
             self._replay_callback = wheel_publish_callback
-            print(f"[▶] Replay started from {filename}")
+            logger.info("[▶] Replay started from %s", filename)
         except Exception as e:
-            print("[✘] Error loading replay:", e)
+            logger.error("[✘] Error loading replay: %s", e)
 
     def update_replay(self):
         if not self.replaying or self._replay_index >= len(self.replay_data):
@@ -466,21 +616,18 @@ class JoystickHandler:
         now = time.time() - self.replay_start_time
 
         while self._replay_index < len(self.replay_data):
-            entry = self.replay_data[self._replay_index]
-            timestamp = float(entry["timestamp"])
+            timestamp, speed = self.replay_data[self._replay_index]
             if timestamp > now:
                 break  # not time yet
 
             # 呼叫 callback 送出對應速度
-            speed = [float(entry["frontLeft"]), float(entry["frontRight"]),
-                    float(entry["rearLeft"]), float(entry["rearRight"])]
             self._replay_callback(speed)
             self.wheel_speed = speed
             self._replay_index += 1
 
         if self._replay_index >= len(self.replay_data):
             self.replaying = False
-            print("[⏹] Replay finished.")
+            logger.info("[⏹] Replay finished.")
 
     def get_joystick(self):
         return self.joystick
\ No newline at end of file
@@ -0,0 +1,170 @@
+# log.py
+# 結構化 logging：等級、同訊息限速/去重，以及寫入記憶體環形緩衝區、由背景執行緒寫檔的 handler。
+# 熱路徑上等級未開啟時，logger.debug(...) 只會做一次等級比較。
+import collections
+import json
+import logging
+import sys
+import threading
+
+LOG_FILE = "robot.log"
+
+# LogRecord 內建的屬性，其餘屬性（透過 extra= 傳入）會當成結構化欄位輸出
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    同一個 logger、等級與訊息內容在 interval 秒內只放行一次，
+    下一次放行時附上期間被略過的次數。
+    超過 interval 沒再出現的訊息會定期清掉，內容一直變的 DEBUG 訊息不會讓字典無限增長。
+    INFO 是連線、手把接上等一次性的事件，一律放行。
+    """
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._next_prune = 0.0
+
+    def _prune(self, now):
+        expired = [key for key, last in self._last.items() if now - last >= self.interval]
+        for key in expired:
+            del self._last[key]
+            self._suppressed.pop(key, None)
+        self._next_prune = now + self.interval
+
+    def filter(self, record):
+        # 同一個 filter 掛在多個 handler 上，同一筆 record 只判斷一次
+        decided = getattr(record, "_rate_allowed", None)
+        if decided is not None:
+            return decided
+        if record.levelno == logging.INFO:
+            return True
+        if record.created >= self._next_prune:
+            self._prune(record.created)
+        key = (record.name, record.levelno, record.getMessage())
+        last = self._last.get(key)
+        if last is not None and record.created - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            record._rate_allowed = False
+            return False
+        self._last[key] = record.created
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        record._rate_allowed = True
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """一行一筆 JSON，包含 extra= 傳入的欄位"""
+    def format(self, record):
+        entry = {
+            "t": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" (suppressed {suppressed} similar)"
+        return text
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    emit 只把 record 放進固定大小的 deque（不阻塞、不做 I/O），
+    背景執行緒每 flush_interval 秒把緩衝區格式化後寫入檔案。
+    緩衝區滿時最舊的 record 會被丟棄。
+    """
+    def __init__(self, filename=LOG_FILE, capacity=10000, flush_interval=1.0):
+        super().__init__()
+        self.filename = filename
+        self.buffer = collections.deque(maxlen=capacity)
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._io_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="log-flush", daemon=True)
+        self._thread.start()
+
+    def emit(self, record):
+        self.buffer.append(record)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._io_lock:
+            if not self.buffer:
+                return
+            lines = []
+            while self.buffer:
+                record = self.buffer.popleft()
+                try:
+                    lines.append(self.format(record))
+                except Exception:
+                    self.handleError(record)
+            try:
+                with open(self.filename, mode="a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError as e:
+                print(f"Error writing log file {self.filename}: {e}", file=sys.stderr)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self.flush()
+        super().close()
+
+
+def get_logger(name):
+    return logging.getLogger(name)
+
+
+def setup_logging(level=logging.INFO, filename=LOG_FILE, rate_limit=1.0):
+    """
+    設定 root logger：終端機顯示文字、檔案寫入 JSON lines，兩者共用同一個限速 filter。
+    level 可為 logging 等級或字串（"DEBUG"、"INFO"...）。
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+
+    rate_filter = RateLimitFilter(rate_limit)
+
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter("%(levelname)s %(name)s: %(message)s"))
+    console.addFilter(rate_filter)
+    root.addHandler(console)
+
+    if filename:
+        ring = RingBufferHandler(filename)
+        ring.setFormatter(JsonFormatter())
+        ring.addFilter(rate_filter)
+        root.addHandler(ring)
+    return root
+
+
+def shutdown_logging():
+    """把環形緩衝區剩下的 record 寫入檔案"""
+    logging.shutdown()
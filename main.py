@@ -1,56 +1,122 @@
+import time
+_launch_time = time.perf_counter()
+
 import csv
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
 import pygame
+from log import get_logger, setup_logging, shutdown_logging
 from ui import UI
-from ws_client import RosbridgeClient
+from ws_client import RosbridgeClient, publish_wheel
 from joystick_handler import JoystickHandler
+from command_server import CommandArbiter, CommandServer, DEFAULT_ADDRESS, KIND_ARM, KIND_WHEEL
+from profiler import FrameTimer, ProfilerSession
+from rate_control import IdleThrottle, RateController
+from telemetry import TelemetryPlot
+from utils import StartupTimer
 
-def load_rosbridge_port(filename="config.csv"):
+logger = get_logger("main")
+
+def load_global_param(param, default, cast=str, filename="config.csv"):
     try:
         with open(filename, newline='') as f:
             reader = csv.DictReader(f)
             for row in reader:
-                if row["type"] == "global" and row["param"] == "rosbridge_port":
-                    return int(row["value1"])
+                if row["type"] == "global" and row["param"] == param:
+                    return cast(row["value1"])
     except Exception as e:
-        print("Error loading rosbridge_port from CSV:", e)
-    return 9090  # 預設值
-
-def publish_wheel(ws_client, cmd, front_topic, rear_topic, front_range, rear_range):
-    # 建立後輪與前輪的完整訊息（std_msgs/Float32MultiArray）
-    rear_msg = {
-        "layout": {
-            "dim": [{
-                "label": "rear_wheels",
-                "size": front_range[1] - front_range[0],  # 可依實際需求調整
-                "stride": front_range[1] - front_range[0]
-            }],
-            "data_offset": 0
-        },
-        "data": cmd[rear_range[0]:rear_range[1]]
-    }
-    front_msg = {
-        "layout": {
-            "dim": [{
-                "label": "front_wheels",
-                "size": rear_range[1] - rear_range[0],
-                "stride": rear_range[1] - rear_range[0]
-            }],
-            "data_offset": 0
-        },
-        "data": cmd[front_range[0]:front_range[1]]
-    }
-    
-    ws_client.publish(rear_topic, rear_msg)
-    ws_client.publish(front_topic, front_msg)
+        print(f"Error loading {param} from CSV:", e)
+    return default
+
+def load_rosbridge_port(filename="config.csv"):
+    return load_global_param("rosbridge_port", 9090, int, filename)  # 預設值 9090
 
 def main():
-    pygame.init()
+    startup = StartupTimer(_launch_time)
+    startup.mark("imports")
+    setup_logging(load_global_param("log_level", "INFO"))
+    startup.mark("logging")
+    # 只初始化需要的子系統（不啟動音效/mixer 等），字型與搖桿由 UI、JoystickHandler 初始化
+    pygame.display.init()
     clock = pygame.time.Clock()
     ui = UI()
+    startup.mark("display+font")
     # 從 CSV 中讀取 rosbridge_port
     rosbridge_port = load_rosbridge_port()
     ws_client = RosbridgeClient(rosbridge_port=rosbridge_port)
     joystick_handler = JoystickHandler()
+    startup.mark("joystick+config")
+    logger.info(startup.report())
+    controller_ready = False
+
+    # F9：開始/停止 cProfile，F10：顯示每個 frame 的耗時
+    profiler = ProfilerSession()
+    frame_timer = FrameTimer()
+
+    # 依量測到的延遲調整發送頻率（主迴圈頻率）
+    rate_controller = RateController(
+        min_rate=load_global_param("publish_rate_min", 10.0, float),
+        max_rate=load_global_param("publish_rate_max", 60.0, float),
+        target_latency=load_global_param("latency_target_ms", 50.0, float) / 1000.0,
+        initial_rate=load_global_param("publish_rate_initial", 30.0, float),
+    )
+    ping_interval = load_global_param("ping_interval", 0.5, float)
+    last_ping = 0.0
+
+    # 事件驅動模式：只在搖桿軸有變動時處理（每個 frame 合併），閒置時降低迴圈與畫面頻率
+    event_driven = load_global_param("event_driven", 0, int) == 1
+    idle_throttle = IdleThrottle(
+        idle_timeout=load_global_param("idle_timeout", 5.0, float),
+        idle_rate=load_global_param("idle_rate", 2.0, float),
+    )
+    keepalive_interval = load_global_param("keepalive_interval", 1.0, float)
+    last_wheel_cmd = [0.0, 0.0, 0.0, 0.0]
+    last_wheel_publish = 0.0
+
+    # G：顯示/隱藏遙測圖
+    telemetry = TelemetryPlot(
+        joystick_handler.arm_joints_count,
+        seconds=load_global_param("telemetry_seconds", 10.0, float),
+        max_rate=rate_controller.max_rate,
+        fps=load_global_param("telemetry_fps", 15.0, float),
+    )
+
+    # 外部程式的指令注入端點，實體手把優先
+    command_server = CommandServer(load_global_param("command_address", DEFAULT_ADDRESS),
+                                   arm_joints=joystick_handler.arm_joints_count)
+    if not command_server.start():
+        command_server = None
+    else:
+        arbiter = CommandArbiter(
+            command_server,
+            manual_hold=load_global_param("command_manual_hold", 0.5, float),
+            command_timeout=load_global_param("command_timeout", 0.5, float),
+        )
+
+    def wheel_publish(cmd):
+        nonlocal last_wheel_cmd, last_wheel_publish
+        last_wheel_cmd = cmd
+        last_wheel_publish = time.perf_counter()
+        start = time.perf_counter() if frame_timer.enabled else 0.0
+        publish_wheel(ws_client, cmd,
+                      joystick_handler.front_wheel_topic,
+                      joystick_handler.rear_wheel_topic,
+                      joystick_handler.front_wheel_range,
+                      joystick_handler.rear_wheel_range)
+        if frame_timer.enabled:
+            frame_timer.add("publish", time.perf_counter() - start)
+
+    def joystick_wheel_publish(cmd):
+        # 外部指令持續送入且手把沒有操作時，不讓手把靜止的輸出覆蓋外部指令
+        if command_server and arbiter.external_owns(KIND_WHEEL, joystick_handler.last_manual_input):
+            return
+        wheel_publish(cmd)
+
+    def arm_publish(arm_msg):
+        start = time.perf_counter() if frame_timer.enabled else 0.0
+        ws_client.publish(joystick_handler.arm_topic, arm_msg)
+        if frame_timer.enabled:
+            frame_timer.add("publish", time.perf_counter() - start)
 
     joysticks = {}
 
@@ -62,10 +128,25 @@ def main():
 
     running = True
     while running:
+        frame_timer.begin_frame()
+        axis_moved = False
         for event in pygame.event.get():
+            # 軸的變動只標記，之後每個 frame 統一讀一次；其他事件都算是有操作
+            if event.type == pygame.JOYAXISMOTION:
+                axis_moved = True
+            else:
+                idle_throttle.mark_active()
+
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                profiler.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F10:
+                frame_timer.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_g and not input_mode:
+                telemetry.toggle()
+
             elif event.type == pygame.KEYDOWN:
                 # 當處於 IP 輸入模式時，累積使用者輸入
                 if input_mode:
@@ -96,54 +177,40 @@ def main():
                         running = False
                     elif event.key == pygame.K_r:
                         joystick_handler.start_recording()
-                        print("[🎬] Start recording...")
+                        logger.info("[🎬] Start recording...")
                     elif event.key == pygame.K_s:
                         joystick_handler.stop_and_save_recording("joystick_recording.csv")
                     elif event.key == pygame.K_p:
                         if not joystick_handler.replaying:
                             joystick_handler.start_replay(
                                 "joystick_recording.csv",
-                                wheel_publish_callback=lambda cmd: publish_wheel(ws_client, cmd,
-                                    joystick_handler.front_wheel_topic,
-                                    joystick_handler.rear_wheel_topic,
-                                    joystick_handler.front_wheel_range,
-                                    joystick_handler.rear_wheel_range)
+                                wheel_publish_callback=wheel_publish
                             )
                         elif joystick_handler.replaying:
                             joystick_handler.replaying = False
-                            print("Stop replay!")
+                            logger.info("Stop replay!")
 
             if not input_mode:
                 if event.type == pygame.JOYBUTTONDOWN:
                     joystick_handler.process_button_press(
                         event.button,
-                        wheel_publish_callback=lambda cmd: publish_wheel(ws_client, cmd,
-                            joystick_handler.front_wheel_topic,
-                            joystick_handler.rear_wheel_topic,
-                            joystick_handler.front_wheel_range,
-                            joystick_handler.rear_wheel_range),
-                        arm_publish_callback=lambda arm_msg: ws_client.publish(joystick_handler.arm_topic, arm_msg)
+                        wheel_publish_callback=wheel_publish,
+                        arm_publish_callback=arm_publish
                     )
+                elif event.type == pygame.JOYBUTTONUP:
+                    joystick_handler.process_button_release(event.button)
                 # elif event.type == pygame.JOYAXISMOTION:
                 #     joystick_handler.process_axis_motion(
                 #         event.axis, 
                 #         event.value, 
-                #         wheel_publish_callback=lambda cmd: publish_wheel(ws_client, cmd,
-                #             joystick_handler.front_wheel_topic,
-                #             joystick_handler.rear_wheel_topic,
-                #             joystick_handler.front_wheel_range,
-                #             joystick_handler.rear_wheel_range)
+                #         wheel_publish_callback=wheel_publish
                 #     )
                 elif event.type == pygame.JOYHATMOTION:
                     (x, y) = event.value
                     joystick_handler.process_hat_press(
                         event.value,
-                        wheel_publish_callback=lambda cmd: publish_wheel(ws_client, cmd,
-                            joystick_handler.front_wheel_topic,
-                            joystick_handler.rear_wheel_topic,
-                            joystick_handler.front_wheel_range,
-                            joystick_handler.rear_wheel_range)
-                    )   
+                        wheel_publish_callback=wheel_publish
+                    )
                 else:
                     pass
 
@@ -153,27 +220,60 @@ def main():
                 # joystick, filling up the list without needing to create them manually.
                 joy = pygame.joystick.Joystick(event.device_index)
                 joysticks[joy.get_instance_id()] = joy
-                print(f"Joystick {joy.get_instance_id()} connencted")
+                joystick_handler.attach_profile(joy)
+                logger.info("Joystick %s connencted", joy.get_instance_id())
+                if not controller_ready:
+                    controller_ready = True
+                    logger.info("Controller ready %.0fms after launch", startup.elapsed() * 1000)
 
             if event.type == pygame.JOYDEVICEREMOVED:
                 del joysticks[event.instance_id]
-                print(f"Joystick {event.instance_id} disconnected")
-        
-        
+                joystick_handler.detach_profile(event.instance_id)
+                logger.info("Joystick %s disconnected", event.instance_id)
+        frame_timer.mark("events")
 
         #continuously pull joystick data instead of waiting for events (for 0s)
+        #事件驅動模式下只在以下情況讀取：軸有變動、搖桿還沒回到中心、正在錄製、
+        #上一筆輪子指令不是 0（按鍵、外部指令或重播結束後，和輪詢模式一樣由搖桿的靜止輸出接手），
+        #或距離上次發送已超過 keepalive_interval（重送搖桿目前的輸出，不會重送別人的指令）
         if joystick_handler.replaying:
             joystick_handler.update_replay()
-        elif pygame.joystick.get_count() > 0:
+            idle_throttle.mark_active()
+        elif pygame.joystick.get_count() > 0 and (
+                not event_driven or axis_moved or any(joystick_handler.last_axes)
+                or joystick_handler.recording_enabled or any(last_wheel_cmd)
+                or time.perf_counter() - last_wheel_publish >= keepalive_interval):
+            previous_axes = joystick_handler.last_axes
             joystick_handler.process_joystick_continous(
                             joysticks, 
-                            wheel_publish_callback=lambda cmd: publish_wheel(ws_client, cmd,
-                            joystick_handler.front_wheel_topic,
-                            joystick_handler.rear_wheel_topic,
-                            joystick_handler.front_wheel_range,
-                            joystick_handler.rear_wheel_range)
+                            wheel_publish_callback=joystick_wheel_publish
                     )
+            # 死區內的雜訊不算操作，避免漂移讓程式一直無法進入閒置
+            if any(joystick_handler.last_axes) or joystick_handler.last_axes != previous_axes:
+                idle_throttle.mark_active()
+
+        # 外部注入的指令（每個 frame 只處理每種指令最新的一筆）
+        if command_server and ws_client.ws:
+            cmd = arbiter.take(KIND_WHEEL, joystick_handler.last_manual_input)
+            if cmd is not None:
+                wheel_publish(cmd)
+                joystick_handler.wheel_speed = cmd
+                idle_throttle.mark_active()
+            positions = arbiter.take(KIND_ARM, joystick_handler.last_manual_input)
+            if positions is not None:
+                joystick_handler.apply_external_arm(positions, arm_publish)
+                idle_throttle.mark_active()
+        telemetry.push(joystick_handler.last_axes, joystick_handler.wheel_speed, joystick_handler.arm_angles)
+        frame_timer.mark("joystick")
+
+        if ws_client.ws:
+            now = time.perf_counter()
+            if now - last_ping >= ping_interval:
+                ws_client.send_ping()
+                last_ping = now
+            rate_controller.update(ws_client.latency(), ws_client.backlog(), now, ws_client.send_time)
 
+        idle = event_driven and idle_throttle.is_idle()
         connection_status = "Connected" if ws_client.ws else "Disconnected"
         ui.draw(
             joystick_handler.velocity,
@@ -186,12 +286,41 @@ def main():
             joystick_handler.arm_index,
             joystick_handler.arm_angles,
             joystick_handler.wheel_speed,
-            joystick_handler.isUnity
+            joystick_handler.isUnity,
+            frame_times=frame_timer.averages if frame_timer.enabled else None,
+            profiling=profiler.running,
+            publish_rate=idle_throttle.idle_rate if idle else rate_controller.rate,
+            rtt=ws_client.latency() if ws_client.ws else None,
+            telemetry=telemetry if telemetry.enabled else None
         )
-        clock.tick(30)
+        frame_timer.mark("draw")
+        frame_timer.end_frame()
+        if idle:
+            # 閒置：阻塞等待事件，最多等到這個 1/idle_rate 週期結束。
+            # 非搖桿軸事件或搖桿真的離開中心時放回佇列並立刻回到正常頻率；
+            # 死區內的軸雜訊直接丟掉繼續等，漂移的手把不會讓閒置時的迴圈全速空轉
+            deadline = time.perf_counter() + idle_throttle.timeout_ms / 1000
+            while True:
+                remaining = int((deadline - time.perf_counter()) * 1000)
+                if remaining <= 0:
+                    break
+                event = pygame.event.wait(remaining)
+                if event.type == pygame.NOEVENT:
+                    break
+                if event.type != pygame.JOYAXISMOTION or joystick_handler.sticks_moved(joysticks):
+                    pygame.event.post(event)
+                    break
+            clock.tick()
+        else:
+            clock.tick(rate_controller.rate)
 
+    if profiler.running:
+        profiler.stop()
+    if command_server:
+        command_server.stop()
     ws_client.disconnect()
     pygame.quit()
+    shutdown_logging()
 
 if __name__ == "__main__":
     main()
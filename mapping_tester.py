@@ -1,6 +1,35 @@
-import pygame
+import argparse
+import math
+import statistics
+import time
 
-pygame.init()
+import pygame
+from calibration import CalibrationProfile, save_profile
+
+# 依 config.csv 的順序列出 wizard 要詢問的映射（axis 與 button）
+WIZARD_AXES = [
+    "left_stick_horizontal",
+    "left_stick_vertical",
+    "right_stick_horizontal",
+    "right_stick_vertical",
+]
+WIZARD_BUTTONS = [
+    "front_button",
+    "back_button",
+    "left_button",
+    "right_button",
+    "stop_button",
+    "resetArm_button",
+    "deceleration_button",
+    "acceleration_button",
+    "armAnglePlus_button",
+    "armAngleMinus_button",
+    "nextArm_button",
+    "previousArm_button",
+    "armAngleStepDegPlus_button",
+    "armAngleStepDegMinus_button",
+    "isUnityButton",
+]
 
 
 # This is a simple class that will help us print to the screen.
@@ -28,7 +57,238 @@ class TextPrint:
         self.x -= 10
 
 
+def wait_for_joystick(timeout=10.0):
+    """等待第一支搖桿連線，逾時回傳 None"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for event in pygame.event.get():
+            if event.type == pygame.JOYDEVICEADDED:
+                joy = pygame.joystick.Joystick(event.device_index)
+                print(f"Using joystick {joy.get_instance_id()}: {joy.get_name()}")
+                return joy
+            if event.type == pygame.QUIT:
+                return None
+        time.sleep(0.01)
+    print("No joystick detected.")
+    return None
+
+
+def sample_axes(joystick, duration):
+    """
+    以最高速率輪詢所有 axis，只記錄數值有變化的樣本。
+    回傳 (times, samples)，samples[k] 為第 k 次更新時所有 axis 的值。
+    """
+    axes = joystick.get_numaxes()
+    times = []
+    samples = []
+    last = None
+    end = time.perf_counter() + duration
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        pygame.event.pump()
+        values = tuple(joystick.get_axis(i) for i in range(axes))
+        if values != last:
+            times.append(now)
+            samples.append(values)
+            last = values
+    return times, samples
+
+
+def rate_stats(times):
+    """由更新時間點計算更新頻率與間隔抖動（毫秒）"""
+    if len(times) < 3:
+        return None
+    intervals = [(b - a) * 1000.0 for a, b in zip(times, times[1:])]
+    intervals.sort()
+    span = times[-1] - times[0]
+    return {
+        "updates": len(times),
+        "rate_hz": (len(times) - 1) / span if span > 0 else 0.0,
+        "mean_ms": statistics.fmean(intervals),
+        "jitter_ms": statistics.pstdev(intervals),
+        "p95_ms": intervals[int(0.95 * (len(intervals) - 1))],
+        "max_ms": intervals[-1],
+    }
+
+
+def rest_stats(times, samples):
+    """
+    計算每個 axis 靜止時的雜訊與漂移。
+    drift 為視窗後四分之一與前四分之一平均值的差。
+    """
+    stats = []
+    if not samples:
+        return stats
+    quarter = max(1, len(samples) // 4)
+    for i in range(len(samples[0])):
+        values = [s[i] for s in samples]
+        mean = statistics.fmean(values)
+        stats.append({
+            "axis": i,
+            "mean": mean,
+            "noise": statistics.pstdev(values),
+            "peak": max(abs(v) for v in values),
+            "drift": statistics.fmean(values[-quarter:]) - statistics.fmean(values[:quarter]),
+            # 板機在放開時停在 -1（或 1），不適用死區
+            "trigger": abs(mean) > 0.5,
+        })
+    return stats
+
+
+def suggest_deadzone(axis_stats, margin=1.25, floor=0.02):
+    """以靜止時的最大偏移加上安全餘量，向上取整到 0.01"""
+    peaks = [s["peak"] + abs(s["drift"]) for s in axis_stats if not s["trigger"]]
+    if not peaks:
+        return floor
+    return max(floor, math.ceil(max(peaks) * margin * 100) / 100)
+
+
+def run_probe(joystick, rest_seconds=5.0, move_seconds=5.0, save=False):
+    print(f"[1/2] Hands off the controller for {rest_seconds:.0f}s (rest noise)...")
+    rest_times, rest_samples = sample_axes(joystick, rest_seconds)
+    axis_stats = rest_stats(rest_times, rest_samples)
+
+    print(f"[2/2] Keep moving both sticks for {move_seconds:.0f}s (update rate)...")
+    move_times, _ = sample_axes(joystick, move_seconds)
+    rate = rate_stats(move_times)
+
+    print(f"\nController: {joystick.get_name()} ({joystick.get_guid()})")
+    if rate:
+        print(f"Updates: {rate['updates']}  rate: {rate['rate_hz']:.1f} Hz  "
+              f"interval: {rate['mean_ms']:.2f} ms  jitter: {rate['jitter_ms']:.2f} ms  "
+              f"p95: {rate['p95_ms']:.2f} ms  max: {rate['max_ms']:.2f} ms")
+    else:
+        print("Not enough axis updates to measure the rate, move the sticks during step 2.")
+
+    print("\nAxis   mean     noise    peak     drift")
+    for s in axis_stats:
+        note = "  (trigger)" if s["trigger"] else ""
+        print(f"{s['axis']:>4} {s['mean']:>7.4f} {s['noise']:>8.4f} {s['peak']:>8.4f} {s['drift']:>8.4f}{note}")
+
+    deadzone = suggest_deadzone(axis_stats)
+    print("\nSuggested config.csv snippet:")
+    print(f"global,min_joystick_value,{deadzone},")
+
+    if save:
+        # 中心偏移取靜止時的平均值；扣掉中心後死區只需涵蓋雜訊
+        centers = {s["axis"]: round(s["mean"], 4) for s in axis_stats if not s["trigger"]}
+        centered = [dict(s, peak=s["peak"] - abs(s["mean"])) for s in axis_stats]
+        profile = CalibrationProfile(joystick.get_guid(), name=joystick.get_name(),
+                                     deadzone=suggest_deadzone(centered), centers=centers)
+        save_profile(profile)
+        print(f"Calibration profile saved for {profile.guid} (deadzone {profile.deadzone})")
+    return rate, axis_stats, deadzone
+
+
+def _wizard_prompt(screen, text_print, lines):
+    screen.fill((255, 255, 255))
+    text_print.reset()
+    for line in lines:
+        text_print.tprint(screen, line)
+    pygame.display.flip()
+
+
+def capture_input(joystick, screen, text_print, name, threshold=0.6):
+    """
+    等待使用者推動一個 axis 或按下一個按鈕，回傳 ("axis"|"button", index)。
+    按 ESC 略過，關閉視窗回傳 None。
+    """
+    pygame.event.pump()
+    baseline = [joystick.get_axis(i) for i in range(joystick.get_numaxes())]
+    _wizard_prompt(screen, text_print, [f"Move / press: {name}", "ESC to skip"])
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return None
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                return ("skip", None)
+            if event.type == pygame.JOYBUTTONDOWN:
+                return ("button", event.button)
+            if event.type == pygame.JOYAXISMOTION:
+                if abs(event.value - baseline[event.axis]) > threshold:
+                    return ("axis", event.axis)
+        time.sleep(0.005)
+
+
+def wait_for_release(joystick, rest, threshold=0.3):
+    """等待所有按鈕放開且 axis 回到靜止值附近，避免同一次動作被下一項捕捉"""
+    while True:
+        pygame.event.pump()
+        buttons = any(joystick.get_button(i) for i in range(joystick.get_numbuttons()))
+        axes = any(abs(joystick.get_axis(i) - rest[i]) > threshold for i in range(len(rest)))
+        if not buttons and not axes:
+            break
+        time.sleep(0.01)
+    time.sleep(0.2)
+    pygame.event.clear()
+
+
+def run_wizard(joystick, screen):
+    text_print = TextPrint()
+    pygame.event.pump()
+    rest = [joystick.get_axis(i) for i in range(joystick.get_numaxes())]
+    rows = []
+    for kind, names in (("axis", WIZARD_AXES), ("button", WIZARD_BUTTONS)):
+        for name in names:
+            while True:
+                result = capture_input(joystick, screen, text_print, name)
+                if result is None:
+                    print("Wizard aborted.")
+                    return rows
+                got, index = result
+                if got == "skip":
+                    print(f"{name}: skipped")
+                    break
+                if got != kind:
+                    print(f"{name}: expected a {kind}, got {got} {index}, try again")
+                    wait_for_release(joystick, rest)
+                    continue
+                print(f"{name}: {kind} {index}")
+                rows.append(f"global,{name},{index},")
+                wait_for_release(joystick, rest)
+                break
+
+    print("\nconfig.csv snippet:")
+    for row in rows:
+        print(row)
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Test the controller mapping.")
+    parser.add_argument("--probe", action="store_true",
+                        help="measure update rate, jitter and rest noise, then suggest a deadzone")
+    parser.add_argument("--rest-seconds", type=float, default=5.0,
+                        help="duration of the hands-off rest measurement")
+    parser.add_argument("--move-seconds", type=float, default=5.0,
+                        help="duration of the moving-stick rate measurement")
+    parser.add_argument("--save-profile", action="store_true",
+                        help="with --probe: save the measured deadzone and centre offsets to controller_profiles.csv")
+    parser.add_argument("--wizard", action="store_true",
+                        help="detect axis/button indices interactively and print a config.csv snippet")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    # 只初始化需要的子系統
+    pygame.display.init()
+    pygame.joystick.init()
+    pygame.font.init()
+    if args.probe or args.wizard:
+        screen = pygame.display.set_mode((500, 200))
+        pygame.display.set_caption("Joystick probe")
+        joystick = wait_for_joystick()
+        if joystick is None:
+            return
+        if args.probe:
+            run_probe(joystick, args.rest_seconds, args.move_seconds, args.save_profile)
+        if args.wizard:
+            run_wizard(joystick, screen)
+        return
+
     # Set the widtH and height of the screen (width, height), and name the window.
     screen = pygame.display.set_mode((500, 900))
     pygame.display.set_caption("Joystick example")
@@ -0,0 +1,102 @@
+# profiler.py
+# 主迴圈的 cProfile 開關，以及每個 frame 各階段耗時的計時器（給 UI overlay 顯示）。
+import cProfile
+import io
+import pstats
+import time
+from log import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProfilerSession:
+    """用熱鍵開始/停止 cProfile，停止時把結果寫到有時間戳記的檔案"""
+    def __init__(self, prefix="profile"):
+        self.prefix = prefix
+        self.profile = None
+
+    @property
+    def running(self):
+        return self.profile is not None
+
+    def toggle(self):
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def start(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        logger.info("Profiler started")
+
+    def stop(self):
+        """停止並寫出 .prof（可用 snakeviz 等工具開啟）與文字摘要 .txt，回傳 .prof 檔名"""
+        self.profile.disable()
+        filename = f"{self.prefix}_{time.strftime('%Y%m%d_%H%M%S')}"
+        try:
+            self.profile.dump_stats(filename + ".prof")
+            text = io.StringIO()
+            pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(40)
+            with open(filename + ".txt", "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+            logger.info("Profiler stopped, results saved to %s.prof / .txt", filename)
+        except OSError as e:
+            logger.error("Error saving profile: %s", e)
+        self.profile = None
+        return filename + ".prof"
+
+
+class FrameTimer:
+    """
+    把每個 frame 的時間分成 events / joystick / publish / draw 四段，
+    以指數移動平均提供給 UI 顯示。未啟用時每個呼叫只做一次屬性判斷。
+    publish 發生在 joystick 處理之中，用 add() 記錄後會從所在的區段扣除。
+    """
+    SECTIONS = ("events", "joystick", "publish", "draw")
+
+    def __init__(self, smoothing=0.1):
+        self.enabled = False
+        self.smoothing = smoothing
+        self.averages = dict.fromkeys(self.SECTIONS, 0.0)
+        self.averages["frame"] = 0.0
+        self._current = dict.fromkeys(self.SECTIONS, 0.0)
+        self._start = 0.0
+        self._last = 0.0
+        self._nested = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.averages = dict.fromkeys(self.averages, 0.0)
+        self._start = 0.0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._start = self._last = time.perf_counter()
+        self._nested = 0.0
+        for section in self._current:
+            self._current[section] = 0.0
+
+    def mark(self, section):
+        """記錄上一次 mark 到現在的時間（扣除期間 add() 的部分）"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current[section] += now - self._last - self._nested
+        self._nested = 0.0
+        self._last = now
+
+    def add(self, section, seconds):
+        if not self.enabled:
+            return
+        self._current[section] += seconds
+        self._nested += seconds
+
+    def end_frame(self):
+        if not self.enabled or not self._start:
+            return
+        a = self.smoothing
+        for section, seconds in self._current.items():
+            self.averages[section] += a * (seconds - self.averages[section])
+        self.averages["frame"] += a * (self._last - self._start - self.averages["frame"])
@@ -0,0 +1,62 @@
+# rate_control.py
+# 依連線品質調整輪子/手臂的發送頻率：延遲超過目標時乘法降低，延遲很低時加法提高 (AIMD)。
+import time
+
+
+class RateController:
+    def __init__(self, min_rate=10.0, max_rate=60.0, target_latency=0.05, initial_rate=30.0,
+                 increase=2.0, decrease=0.7, max_backlog=2, send_budget=0.25, interval=0.5):
+        """
+        min_rate / max_rate：頻率上下限 (Hz)
+        target_latency：延遲目標（秒）
+        increase：每次提高的頻率 (Hz)；decrease：每次降低時乘上的比例
+        max_backlog：未回覆的 ping 超過這個數量視為連線塞車
+        send_budget：ws.send 平均花費超過一個 frame 時間的這個比例，視為送出端塞車
+        interval：兩次調整之間的最短時間（秒）
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.max_backlog = max_backlog
+        self.send_budget = send_budget
+        self.interval = interval
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self._last_update = 0.0
+
+    def update(self, latency, backlog=0, now=None, send_time=0.0):
+        """依最新的延遲、ping 積壓量與 ws.send 花費時間調整頻率，回傳目前頻率"""
+        now = time.perf_counter() if now is None else now
+        if latency is None or now - self._last_update < self.interval:
+            return self.rate
+        self._last_update = now
+        congested = backlog > self.max_backlog or send_time > self.send_budget / self.rate
+        if latency > self.target_latency or congested:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+        elif latency < self.target_latency * 0.5:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+        return self.rate
+
+
+class IdleThrottle:
+    """
+    事件驅動模式下，超過 idle_timeout 秒沒有輸入就降到 idle_rate，
+    有新的輸入時立刻回到正常頻率。
+    """
+    def __init__(self, idle_timeout=5.0, idle_rate=2.0):
+        self.idle_timeout = idle_timeout
+        self.idle_rate = idle_rate
+        self.last_activity = time.perf_counter()
+
+    def mark_active(self, now=None):
+        self.last_activity = time.perf_counter() if now is None else now
+
+    def is_idle(self, now=None):
+        now = time.perf_counter() if now is None else now
+        return now - self.last_activity > self.idle_timeout
+
+    @property
+    def timeout_ms(self):
+        """閒置時等待事件的最長時間 (ms)"""
+        return int(1000 / self.idle_rate)
@@ -0,0 +1,207 @@
+# recording_analytics.py
+# 分析 joystick_recording.csv：長度、實際取樣率、漏掉的樣本、各輪速度分佈、搖桿推到底的時間，
+# 以及兩次錄製對齊時間後的差異。大量檔案時用多個 process 平行處理。
+#
+#   python recording_analytics.py "runs/*.csv" --jobs 8 --output summary.csv
+#   python recording_analytics.py --diff run_a.csv run_b.csv
+import argparse
+import csv
+import glob
+import os
+import sys
+from multiprocessing import Pool
+import numpy as np
+
+AXES = ["axis_horizontal", "axis_vertical", "axis_rotational"]
+WHEELS = ["frontLeft", "frontRight", "rearLeft", "rearRight"]
+
+SUMMARY_FIELDS = (
+    ["file", "samples", "duration", "sample_rate", "median_dt_ms", "gaps", "gap_time", "dropped",
+     "saturated_time", "saturated_ratio"]
+    + [f"{wheel}_{stat}" for wheel in WHEELS for stat in ("mean", "std", "min", "p5", "p50", "p95", "max")]
+)
+
+
+def load_recording_array(filename):
+    """以 numpy 一次讀入整個錄製檔，回傳 (timestamps, axes (n, 3), wheels (n, 4))"""
+    with open(filename, newline="") as f:
+        header = f.readline().strip().split(",")
+        data = np.loadtxt(f, delimiter=",", ndmin=2)
+    if data.size == 0:
+        data = np.zeros((0, len(header)))
+    index = {name: i for i, name in enumerate(header)}
+    timestamps = data[:, index["timestamp"]]
+    axes = data[:, [index[name] for name in AXES]]
+    wheels = data[:, [index[name] for name in WHEELS]]
+    return timestamps, axes, wheels
+
+
+def analyze(filename, gap_factor=2.0, saturation=0.99):
+    """
+    單一檔案的統計。間隔超過中位數 gap_factor 倍視為漏樣本；
+    任一軸 |值| >= saturation 的時間（以到下一個樣本的間隔加權）視為推到底。
+    """
+    timestamps, axes, wheels = load_recording_array(filename)
+    n = len(timestamps)
+    result = dict.fromkeys(SUMMARY_FIELDS, 0.0)
+    result["file"] = filename
+    result["samples"] = n
+    if n < 2:
+        return result
+
+    dt = np.diff(timestamps)
+    median_dt = float(np.median(dt))
+    duration = float(timestamps[-1] - timestamps[0])
+    gaps = dt > gap_factor * median_dt
+    saturated = np.any(np.abs(axes[:-1]) >= saturation, axis=1)
+
+    result.update({
+        "duration": duration,
+        "sample_rate": (n - 1) / duration if duration > 0 else 0.0,
+        "median_dt_ms": median_dt * 1000,
+        "gaps": int(np.count_nonzero(gaps)),
+        "gap_time": float(dt[gaps].sum()),
+        "dropped": int(np.rint(dt[gaps] / median_dt).sum() - np.count_nonzero(gaps)) if median_dt > 0 else 0,
+        "saturated_time": float(dt[saturated].sum()),
+        "saturated_ratio": float(dt[saturated].sum() / duration) if duration > 0 else 0.0,
+    })
+    percentiles = np.percentile(wheels, [5, 50, 95], axis=0)
+    stats = {
+        "mean": wheels.mean(axis=0),
+        "std": wheels.std(axis=0),
+        "min": wheels.min(axis=0),
+        "p5": percentiles[0],
+        "p50": percentiles[1],
+        "p95": percentiles[2],
+        "max": wheels.max(axis=0),
+    }
+    for i, wheel in enumerate(WHEELS):
+        for stat, values in stats.items():
+            result[f"{wheel}_{stat}"] = float(values[i])
+    return result
+
+
+def _analyze_safe(filename):
+    try:
+        return analyze(filename)
+    except Exception as e:
+        return {"file": filename, "error": str(e)}
+
+
+def analyze_many(files, jobs=None, chunksize=16):
+    """平行分析多個檔案，依輸入順序產生結果"""
+    if jobs == 1 or len(files) < 2:
+        yield from map(_analyze_safe, files)
+        return
+    with Pool(jobs) as pool:
+        yield from pool.imap(_analyze_safe, files, chunksize=chunksize)
+
+
+def _resample(timestamps, wheels, grid):
+    return np.stack([np.interp(grid, timestamps, wheels[:, i]) for i in range(wheels.shape[1])], axis=1)
+
+
+def diff_recordings(file_a, file_b, max_lag=2.0):
+    """
+    把兩個錄製檔各自從第一個時間戳記開始重新取樣，以整體輪速的互相關找出時間差，
+    只在對齊後兩者都有資料的時間範圍內比較各輪速度（不外插）。
+    lag > 0 表示 b 比 a 晚開始動作。
+    """
+    t_a, _, w_a = load_recording_array(file_a)
+    t_b, _, w_b = load_recording_array(file_b)
+    if len(t_a) < 2 or len(t_b) < 2:
+        raise ValueError("recordings need at least two samples")
+    step = float(min(np.median(np.diff(t_a)), np.median(np.diff(t_b))))
+    grid_a = np.arange(t_a[0], t_a[-1] + step / 2, step)
+    grid_b = np.arange(t_b[0], t_b[-1] + step / 2, step)
+
+    # 以四輪速度絕對值的平均做互相關；shift k 表示 b 的第 n + k 個樣本對應 a 的第 n 個
+    sig_a = np.abs(_resample(t_a, w_a, grid_a)).mean(axis=1)
+    sig_b = np.abs(_resample(t_b, w_b, grid_b)).mean(axis=1)
+    sig_a = sig_a - sig_a.mean()
+    sig_b = sig_b - sig_b.mean()
+    correlation = np.correlate(sig_b, sig_a, mode="full")
+    offset = float(grid_b[0] - grid_a[0])
+    lowest = max(int(np.ceil((-max_lag - offset) / step)), -(len(grid_a) - 1))
+    highest = min(int(np.floor((max_lag - offset) / step)), len(grid_b) - 1)
+    if lowest > highest or not correlation.any():
+        shift = int(np.clip(round(-offset / step), -(len(grid_a) - 1), len(grid_b) - 1))
+    else:
+        window = correlation[lowest + len(grid_a) - 1:highest + len(grid_a)]
+        shift = lowest + int(np.argmax(window))
+    lag = offset + shift * step
+
+    # 對齊後的共同時間範圍（以 b 的時間表示）
+    start = max(t_b[0], t_a[0] + lag)
+    end = min(t_b[-1], t_a[-1] + lag)
+    if end < start:
+        raise ValueError("recordings do not overlap after alignment")
+    grid = np.arange(start, end + step / 2, step)
+    grid = grid[grid <= end]
+    delta = _resample(t_b, w_b, grid) - _resample(t_a, w_a, grid - lag)
+    return {
+        "lag": lag,
+        "overlap": float(end - start),
+        "rms": np.sqrt(np.mean(delta ** 2, axis=0)),
+        "max_abs": np.abs(delta).max(axis=0),
+        "mean": delta.mean(axis=0),
+    }
+
+
+def expand_files(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.csv")
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Analyze and compare joystick recordings.")
+    parser.add_argument("files", nargs="*", help="recording CSV files, directories or glob patterns")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", help="write the per-file summary CSV here instead of stdout")
+    parser.add_argument("--diff", nargs=2, metavar=("A", "B"), help="compare two recordings after time alignment")
+    parser.add_argument("--max-lag", type=float, default=2.0, help="largest time shift searched by --diff (seconds)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.diff:
+        result = diff_recordings(args.diff[0], args.diff[1], args.max_lag)
+        print(f"lag: {result['lag']:.3f}s  overlap: {result['overlap']:.2f}s")
+        print("wheel        rms    max_abs   mean")
+        for i, wheel in enumerate(WHEELS):
+            print(f"{wheel:<10} {result['rms'][i]:>6.3f} {result['max_abs'][i]:>9.3f} {result['mean'][i]:>7.3f}")
+        return
+
+    files = expand_files(args.files)
+    if not files:
+        print("No recordings given.")
+        return
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    analyzed = 0
+    total_duration = 0.0
+    total_dropped = 0
+    for result in analyze_many(files, args.jobs):
+        if "error" in result:
+            print(f"[✘] {result['file']}: {result['error']}", file=sys.stderr)
+            continue
+        writer.writerow({k: (f"{v:.6g}" if isinstance(v, float) else v) for k, v in result.items()})
+        analyzed += 1
+        total_duration += result["duration"]
+        total_dropped += result["dropped"]
+    if args.output:
+        out.close()
+    print(f"Analyzed {analyzed}/{len(files)} recordings, total {total_duration:.1f}s, "
+          f"{total_dropped} dropped samples", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+# sim_robot.py
+# 離線調參用的模擬機器人：
+#   1. 內建簡易的 rosbridge websocket 伺服器，接收輪子 topic 與 JointTrajectoryPoint，
+#      並回覆 call_service（讓 RosbridgeClient 可以量測 RTT）
+#   2. 依麥克納姆輪運動學積分出車子的位置，手臂關節以固定速度移向目標角度
+#   3. 另開一個 pygame 視窗畫出俯視圖與關節角度
+# 也可以不開伺服器，直接用 --eval 以超過即時的速度批次評估錄製檔。
+#
+#   python sim_robot.py                       # 在 9090 等待 main.py / batch_replay.py 連線
+#   python sim_robot.py --eval "runs/*.csv"   # 批次評估錄製檔
+import argparse
+import base64
+import csv
+import glob
+import hashlib
+import json
+import math
+import socket
+import struct
+import threading
+import time
+from log import get_logger, setup_logging, shutdown_logging
+from utils import load_recording, read_global_params, topic_config
+
+logger = get_logger(__name__)
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def load_sim_config(filename="config.csv"):
+    """讀取模擬需要的 topic、關節數與上下限，以及 sim_* 參數"""
+    params = {}
+    joint_limits = []
+    try:
+        params = read_global_params(filename)
+        with open(filename, newline='') as f:
+            for row in csv.DictReader(f):
+                if row["type"] == "joint":
+                    joint_limits.append((int(row["param"]), float(row["value1"]), float(row["value2"])))
+    except Exception as e:
+        logger.error("Error loading sim config from CSV: %s", e)
+    config = topic_config(params)
+    config.update({
+        "joints_count": int(params.get("joints_count") or 7),
+        "sim_speed_scale": float(params.get("sim_speed_scale") or 0.02),   # 每單位輪速對應的速度 (m/s)
+        "sim_turn_scale": float(params.get("sim_turn_scale") or 0.05),     # 每單位輪速對應的角速度 (rad/s)
+        "sim_joint_speed": float(params.get("sim_joint_speed") or 90.0),   # 關節最大角速度 (deg/s)
+        "joint_limits": [(math.radians(lo), math.radians(hi)) for _, lo, hi in sorted(joint_limits)],
+    })
+    return config
+
+
+class SimRobot:
+    """麥克納姆輪車體與手臂關節的模擬狀態"""
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.wheel_speed = [0.0, 0.0, 0.0, 0.0]   # frontLeft, frontRight, rearLeft, rearRight
+        self.x = 0.0
+        self.y = 0.0
+        self.theta = math.pi / 2                  # 朝向畫面上方
+        self.distance = 0.0
+        self.sim_time = 0.0
+        count = config["joints_count"]
+        self.joints = [0.0] * count
+        self.joint_targets = [0.0] * count
+        self.trail = [(self.x, self.y)]
+
+    def set_wheels(self, start, values):
+        with self.lock:
+            for i, value in enumerate(values):
+                if 0 <= start + i < 4:
+                    self.wheel_speed[start + i] = float(value)
+
+    def set_joint_targets(self, positions):
+        limits = self.config["joint_limits"]
+        with self.lock:
+            for i, value in enumerate(positions[:len(self.joint_targets)]):
+                if i < len(limits):
+                    value = max(limits[i][0], min(value, limits[i][1]))
+                self.joint_targets[i] = value
+
+    def body_velocity(self):
+        """
+        與 JoystickHandler.process_joystick_continous 的混合方式相反：
+        frontLeft = v + h + r, frontRight = v - h - r, rearLeft = v - h + r, rearRight = v + h - r
+        回傳 (前進 m/s, 向右 m/s, 逆時針 rad/s)
+        """
+        fl, fr, rl, rr = self.wheel_speed
+        v = (fl + fr + rl + rr) / 4
+        h = (fl - fr - rl + rr) / 4
+        r = (fl - fr + rl - rr) / 4
+        return v * self.config["sim_speed_scale"], h * self.config["sim_speed_scale"], -r * self.config["sim_turn_scale"]
+
+    def step(self, dt):
+        if dt <= 0:
+            return
+        with self.lock:
+            forward, right, omega = self.body_velocity()
+            # 以半步的朝向積分，轉彎時較準確
+            heading = self.theta + omega * dt / 2
+            dx = (forward * math.cos(heading) + right * math.sin(heading)) * dt
+            dy = (forward * math.sin(heading) - right * math.cos(heading)) * dt
+            self.x += dx
+            self.y += dy
+            self.theta = (self.theta + omega * dt) % (2 * math.pi)
+            self.distance += math.hypot(dx, dy)
+            self.sim_time += dt
+            max_step = math.radians(self.config["sim_joint_speed"]) * dt
+            for i, target in enumerate(self.joint_targets):
+                delta = target - self.joints[i]
+                self.joints[i] += max(-max_step, min(delta, max_step))
+            last = self.trail[-1]
+            if abs(self.x - last[0]) + abs(self.y - last[1]) > 0.01:
+                self.trail.append((self.x, self.y))
+                if len(self.trail) > 5000:
+                    del self.trail[:1000]
+
+
+class RosbridgeStandIn:
+    """只支援本專案用到的 rosbridge 操作：advertise、publish、call_service"""
+    def __init__(self, robot, port=9090, host="127.0.0.1"):
+        self.robot = robot
+        self.port = port
+        self.host = host
+        self.config = robot.config
+        self.messages = 0
+        self.clients = 0
+        self.last_clock = None       # 最近一次收到 /clock 的模擬時間
+        self.last_clock_wall = 0.0
+        self._server = None
+
+    def start(self):
+        """開始接受連線，成功回傳 True；預設只聽本機，沒有驗證的控制端點不對外開放"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind((self.host, self.port))
+            server.listen(4)
+        except OSError as e:
+            server.close()
+            logger.error("Cannot listen on %s:%d (%s). Is a real rosbridge already running? Use --port to pick another port.",
+                         self.host, self.port, e)
+            return False
+        self._server = server
+        threading.Thread(target=self._accept_loop, name="sim-accept", daemon=True).start()
+        logger.info("Simulated rosbridge listening on ws://%s:%d", self.host, self.port)
+        return True
+
+    def clock_driven(self):
+        """最近有收到 /clock 時由模擬時鐘推進，不用牆上時間"""
+        return self.last_clock is not None and time.time() - self.last_clock_wall < 1.0
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, addr = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn, addr), daemon=True).start()
+
+    def _serve(self, conn, addr):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = conn.makefile("rb")
+        connected = False
+        try:
+            if not self._handshake(conn, reader):
+                return
+            connected = True
+            self.clients += 1
+            logger.info("Client %s connected", addr[0])
+            while True:
+                opcode, payload = self._read_frame(reader)
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    self._send_frame(conn, 0xA, payload)
+                elif opcode == 0x1:
+                    self._handle(conn, payload)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+            # 握手失敗的連線沒有計入
+            if connected:
+                self.clients -= 1
+                logger.info("Client %s disconnected", addr[0])
+
+    def _handshake(self, conn, reader):
+        key = None
+        while True:
+            line = reader.readline()
+            if not line:
+                return False
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip()
+        if key is None:
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        conn.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return True
+
+    def _read_frame(self, reader):
+        """讀取一個（可能分段的）訊息，回傳 (opcode, payload)"""
+        message_opcode = None
+        chunks = []
+        while True:
+            header = reader.read(2)
+            if len(header) < 2:
+                return None, None
+            fin = header[0] & 0x80
+            opcode = header[0] & 0x0F
+            length = header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", reader.read(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", reader.read(8))[0]
+            mask = reader.read(4) if header[1] & 0x80 else None
+            payload = reader.read(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode >= 0x8:
+                return opcode, payload
+            if opcode != 0x0:
+                message_opcode = opcode
+            chunks.append(payload)
+            if fin:
+                return message_opcode, b"".join(chunks)
+
+    def _send_frame(self, conn, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        conn.sendall(header + payload)
+
+    def _handle(self, conn, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        self.messages += 1
+        op = message.get("op")
+        if op == "publish":
+            self._handle_publish(message.get("topic"), message.get("msg") or {})
+        elif op == "call_service":
+            sec = self.robot.sim_time if self.clock_driven() else time.time()
+            response = {
+                "op": "service_response",
+                "id": message.get("id"),
+                "service": message.get("service"),
+                "values": {"sec": int(sec), "nanosec": int((sec % 1) * 1e9)},
+                "result": True,
+            }
+            self._send_frame(conn, 0x1, json.dumps(response).encode())
+
+    def _handle_publish(self, topic, msg):
+        config = self.config
+        if topic == config["front_wheel_topic"]:
+            self.robot.set_wheels(config["front_wheel_range"][0], msg.get("data", []))
+        elif topic == config["rear_wheel_topic"]:
+            self.robot.set_wheels(config["rear_wheel_range"][0], msg.get("data", []))
+        elif topic == config["arm_topic"]:
+            self.robot.set_joint_targets(msg.get("positions", []))
+        elif topic == "/clock":
+            clock = msg.get("clock", {})
+            sim = clock.get("sec", 0) + clock.get("nanosec", 0) * 1e-9
+            # 由 batch_replay 的模擬時鐘推進，倍速重播時積分仍正確
+            if self.last_clock is not None and sim > self.last_clock:
+                self.robot.step(sim - self.last_clock)
+            self.last_clock = sim
+            self.last_clock_wall = time.time()
+
+
+def evaluate_recording(filename, config, speed=0.0, dt=0.01):
+    """
+    不經過網路，直接把錄製檔的輪速送進模型。speed <= 0 為最快速度，否則為倍速。
+    兩個樣本之間以 dt 為步長積分。
+    """
+    robot = SimRobot(config)
+    samples = load_recording(filename)
+    start = time.perf_counter()
+    previous = 0.0
+    max_speed = 0.0
+    for timestamp, cmd in samples:
+        remaining = timestamp - previous
+        while remaining > 1e-9:
+            step = min(dt, remaining)
+            robot.step(step)
+            remaining -= step
+        previous = timestamp
+        robot.set_wheels(0, cmd)
+        forward, right, _ = robot.body_velocity()
+        max_speed = max(max_speed, math.hypot(forward, right))
+        if speed > 0:
+            delay = start + timestamp / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    return {
+        "file": filename,
+        "duration": robot.sim_time,
+        "x": robot.x,
+        "y": robot.y,
+        "heading_deg": math.degrees(robot.theta - math.pi / 2) % 360,
+        "distance": robot.distance,
+        "max_speed": max_speed,
+        "wall": time.perf_counter() - start,
+    }
+
+
+class SimView:
+    """俯視圖（左）與關節角度（右）"""
+    def __init__(self, robot, stand_in, scale=100):
+        import pygame
+        self.pygame = pygame
+        pygame.display.init()
+        pygame.font.init()
+        self.robot = robot
+        self.stand_in = stand_in
+        self.scale = scale   # 每公尺的像素數
+        self.screen = pygame.display.set_mode((1000, 600), pygame.RESIZABLE)
+        pygame.display.set_caption("Simulated robot")
+        self.font = pygame.font.Font(None, 24)
+
+    def to_screen(self, x, y, origin):
+        return (origin[0] + (x - self.robot.x) * self.scale, origin[1] - (y - self.robot.y) * self.scale)
+
+    def draw(self):
+        pygame = self.pygame
+        robot = self.robot
+        screen = self.screen
+        screen.fill((20, 20, 20))
+        width, height = screen.get_size()
+        panel = width - 300
+        origin = (panel / 2, height / 2)
+
+        # 以車子為中心的格線（每公尺一條）
+        offset_x = (robot.x * self.scale) % self.scale
+        offset_y = (robot.y * self.scale) % self.scale
+        for gx in range(-int(panel / self.scale) - 1, int(panel / self.scale) + 2):
+            px = origin[0] + gx * self.scale - offset_x
+            pygame.draw.line(screen, (45, 45, 45), (px, 0), (px, height))
+        for gy in range(-int(height / self.scale) - 1, int(height / self.scale) + 2):
+            py = origin[1] - gy * self.scale + offset_y
+            pygame.draw.line(screen, (45, 45, 45), (0, py), (panel, py))
+
+        with robot.lock:
+            trail = [self.to_screen(x, y, origin) for x, y in robot.trail[-2000:]]
+            trail.append(origin)
+            theta = robot.theta
+            joints = list(robot.joints)
+            targets = list(robot.joint_targets)
+            wheels = list(robot.wheel_speed)
+        if len(trail) > 1:
+            pygame.draw.lines(screen, (80, 160, 255), False, trail)
+
+        # 車體（0.3 m x 0.4 m）與朝向
+        half_w, half_l = 0.15 * self.scale, 0.2 * self.scale
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        corners = []
+        for lx, ly in ((half_l, half_w), (half_l, -half_w), (-half_l, -half_w), (-half_l, half_w)):
+            corners.append((origin[0] + lx * cos_t - ly * sin_t, origin[1] - (lx * sin_t + ly * cos_t)))
+        pygame.draw.polygon(screen, (200, 200, 200), corners, 2)
+        pygame.draw.line(screen, (255, 80, 80), origin, (origin[0] + half_l * cos_t, origin[1] - half_l * sin_t), 3)
+
+        lines = [
+            f"x: {robot.x:.2f} m  y: {robot.y:.2f} m",
+            f"heading: {math.degrees(theta - math.pi / 2) % 360:.1f} deg",
+            f"distance: {robot.distance:.2f} m",
+            f"wheels: {', '.join(f'{w:.1f}' for w in wheels)}",
+            f"clients: {self.stand_in.clients}  msgs: {self.stand_in.messages}",
+            "clock: /clock" if self.stand_in.clock_driven() else "clock: real time",
+        ]
+        for i, line in enumerate(lines):
+            screen.blit(self.font.render(line, True, (255, 255, 255)), (panel + 10, 10 + i * 24))
+
+        # 關節角度：白色為目前角度，灰色為目標
+        y = 170
+        for i, (angle, target) in enumerate(zip(joints, targets)):
+            screen.blit(self.font.render(f"J{i}: {math.degrees(angle):6.1f}", True, (255, 255, 255)), (panel + 10, y))
+            bar_x = panel + 110
+            pygame.draw.rect(screen, (60, 60, 60), (bar_x, y + 4, 180, 12))
+            for value, color in ((target, (120, 120, 120)), (angle, (0, 200, 0))):
+                px = bar_x + 90 + max(-90, min(90, math.degrees(value) / 2))
+                pygame.draw.line(screen, color, (px, y + 2), (px, y + 18), 3)
+            y += 28
+
+        pygame.display.flip()
+
+    def run(self, fps=60):
+        pygame = self.pygame
+        clock = pygame.time.Clock()
+        last = time.perf_counter()
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
+                    running = False
+            now = time.perf_counter()
+            if not self.stand_in.clock_driven():
+                self.robot.step(now - last)
+            last = now
+            self.draw()
+            clock.tick(fps)
+        pygame.quit()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulated robot and rosbridge stand-in for offline tuning.")
+    parser.add_argument("--port", type=int, default=None, help="rosbridge port (default: config.csv)")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on (default: 127.0.0.1; use 0.0.0.0 to accept other machines)")
+    parser.add_argument("--config", default="config.csv", help="config CSV file")
+    parser.add_argument("--headless", action="store_true", help="run the stand-in without a window")
+    parser.add_argument("--eval", nargs="+", metavar="FILE",
+                        help="evaluate recordings offline instead of serving (glob patterns allowed)")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="with --eval: playback multiple; 0 runs as fast as possible")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_logging("INFO", filename=None)
+    config = load_sim_config(args.config)
+
+    if args.eval:
+        files = []
+        for pattern in args.eval:
+            files.extend(sorted(glob.glob(pattern)) or [pattern])
+        print("file,duration,x,y,heading_deg,distance,max_speed,wall")
+        for filename in files:
+            try:
+                r = evaluate_recording(filename, config, args.speed)
+            except Exception as e:
+                logger.error("Error evaluating %s: %s", filename, e)
+                continue
+            print(f"{r['file']},{r['duration']:.3f},{r['x']:.3f},{r['y']:.3f},{r['heading_deg']:.1f},"
+                  f"{r['distance']:.3f},{r['max_speed']:.3f},{r['wall']:.4f}")
+        shutdown_logging()
+        return
+
+    robot = SimRobot(config)
+    stand_in = RosbridgeStandIn(robot, args.port or config["rosbridge_port"], args.host)
+    if not stand_in.start():
+        shutdown_logging()
+        raise SystemExit(1)
+    try:
+        if args.headless:
+            last = time.perf_counter()
+            while True:
+                time.sleep(0.01)
+                now = time.perf_counter()
+                if not stand_in.clock_driven():
+                    robot.step(now - last)
+                last = now
+        else:
+            SimView(robot, stand_in).run()
+    except KeyboardInterrupt:
+        pass
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
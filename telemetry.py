@@ -0,0 +1,123 @@
+# telemetry.py
+# 即時遙測圖：搖桿軸、輪速指令與關節角度最近 N 秒的捲動曲線。
+# 資料存在預先配置的 numpy 環形緩衝區（每個 frame 只寫入一列，不會增長 list），
+# 繪圖依自己的頻率重畫到快取的 Surface，每條曲線只呼叫一次 pygame.draw.lines。
+import math
+import time
+import numpy as np
+import pygame
+
+COLORS = [(255, 90, 90), (90, 200, 90), (90, 150, 255), (240, 200, 60),
+          (200, 100, 255), (80, 220, 220), (255, 150, 60), (180, 180, 180)]
+
+
+def nice_range(peak):
+    """大於等於 peak 的 1、2、5 x 10^n 刻度"""
+    if peak <= 1.0:
+        return 1.0
+    base = 10 ** math.floor(math.log10(peak))
+    for step in (1, 2, 5, 10):
+        if step * base >= peak:
+            return step * base
+    return 10 * base
+
+
+class RingBuffer:
+    """固定大小的時間序列緩衝區：times (capacity,)、values (capacity, channels)"""
+    def __init__(self, capacity, channels):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity, channels))
+        self.index = 0
+        self.count = 0
+
+    def push(self, t, values):
+        i = self.index
+        self.times[i] = t
+        self.values[i] = values
+        self.index = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def since(self, t_start):
+        """依時間順序回傳 t >= t_start 的 (times, values)"""
+        if self.count < self.capacity:
+            times, values = self.times[:self.count], self.values[:self.count]
+        else:
+            order = np.r_[self.index:self.capacity, 0:self.index]
+            times, values = self.times[order], self.values[order]
+        start = np.searchsorted(times, t_start)
+        return times[start:], values[start:]
+
+
+class TelemetryPlot:
+    def __init__(self, joints_count, seconds=10.0, max_rate=60.0, fps=15.0):
+        capacity = int(seconds * max_rate * 1.5) + 1
+        self.seconds = seconds
+        self.interval = 1.0 / fps
+        self.panels = [
+            ("Axes", ["horizontal", "vertical", "rotational"], RingBuffer(capacity, 3), 1.0),
+            ("Wheels", ["FL", "FR", "RL", "RR"], RingBuffer(capacity, 4), None),
+            ("Joints (deg)", [f"J{i}" for i in range(joints_count)], RingBuffer(capacity, joints_count), None),
+        ]
+        self.enabled = False
+        self.font = pygame.font.Font(None, 18)
+        self._surface = None
+        self._last_render = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def push(self, axes, wheels, joint_angles, t=None):
+        """控制迴圈每個 frame 呼叫一次，只寫入緩衝區"""
+        if not self.enabled:
+            return
+        t = time.perf_counter() if t is None else t
+        self.panels[0][2].push(t, axes)
+        self.panels[1][2].push(t, wheels)
+        self.panels[2][2].push(t, np.degrees(joint_angles))
+
+    def draw(self, screen, rect):
+        """依 fps 重畫快取的圖，其餘 frame 只 blit"""
+        now = time.perf_counter()
+        rect = pygame.Rect(rect)
+        # 視窗縮得太小時沒有空間可畫
+        if rect.width <= 0 or rect.height <= 0:
+            return
+        if self._surface is None or self._surface.get_size() != rect.size or now - self._last_render >= self.interval:
+            self._render(rect.size, now)
+            self._last_render = now
+        screen.blit(self._surface, rect.topleft)
+
+    def _render(self, size, now):
+        if self._surface is None or self._surface.get_size() != size:
+            self._surface = pygame.Surface(size)
+        surface = self._surface
+        surface.fill((15, 15, 15))
+        width, height = size
+        panel_height = height // len(self.panels)
+        t_start = now - self.seconds
+        for p, (title, labels, buffer, fixed_range) in enumerate(self.panels):
+            top = p * panel_height
+            area = pygame.Rect(40, top + 16, width - 50, panel_height - 22)
+            pygame.draw.rect(surface, (60, 60, 60), area, 1)
+            pygame.draw.line(surface, (50, 50, 50), (area.left, area.centery), (area.right, area.centery))
+            times, values = buffer.since(t_start)
+
+            y_range = fixed_range
+            if y_range is None:
+                y_range = nice_range(float(np.abs(values).max()) if len(values) else 0.0)
+            surface.blit(self.font.render(f"{title}  ±{y_range:g}", True, (220, 220, 220)), (area.left, top + 2))
+            label_x = area.left + 150
+            for i, label in enumerate(labels):
+                text = self.font.render(label, True, COLORS[i % len(COLORS)])
+                surface.blit(text, (label_x, top + 2))
+                label_x += text.get_width() + 12
+
+            if len(times) < 2:
+                continue
+            xs = area.right - (now - times) / self.seconds * area.width
+            ys = area.centery - np.clip(values / y_range, -1, 1) * (area.height / 2)
+            for i in range(values.shape[1]):
+                points = np.column_stack((xs, ys[:, i])).tolist()
+                pygame.draw.lines(surface, COLORS[i % len(COLORS)], False, points)
@@ -1,15 +1,40 @@
 # ui.py
+import os
 import pygame
 import math
 
+FONT_CACHE_FILE = ".font_cache"
+
+def load_font(name="Arial", size=24, cache_file=FONT_CACHE_FILE):
+    """
+    SysFont 每次都會掃描系統字型，這裡把找到的字型路徑快取到檔案，
+    之後直接用路徑載入；找不到時使用 pygame 內建字型。
+    """
+    path = None
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached_name, cached_path = f.read().split("\n", 1)
+        if cached_name == name and (not cached_path or os.path.exists(cached_path)):
+            path = cached_path
+    except (OSError, ValueError):
+        pass
+    if path is None:
+        path = pygame.font.match_font(name) or ""
+        try:
+            with open(cache_file, "w", encoding="utf-8") as f:
+                f.write(f"{name}\n{path}")
+        except OSError:
+            pass
+    return pygame.font.Font(path or None, size)
+
 class UI:
     def __init__(self):
         pygame.font.init()
         self.screen = pygame.display.set_mode((1200, 600), pygame.RESIZABLE)
         pygame.display.set_caption("Xbox Series X Controller UI")
-        self.font = pygame.font.SysFont("Arial", 24)
+        self.font = load_font("Arial", 24)
 
-    def draw(self, velocity, angle, rosbridge_ip, connection_status, connection_error, input_mode, ip_input, arm_index, arm_angles, wheel_speed, isInUnity):
+    def draw(self, velocity, angle, rosbridge_ip, connection_status, connection_error, input_mode, ip_input, arm_index, arm_angles, wheel_speed, isInUnity, frame_times=None, profiling=False, publish_rate=None, rtt=None, telemetry=None):
         self.screen.fill((0, 0, 0))
 
         # 顯示速度
@@ -28,6 +53,12 @@ class UI:
         self.screen.blit(connection_text, (10, 100))
         
 
+        # 顯示發送頻率與延遲
+        if publish_rate is not None:
+            rtt_text = f"{rtt * 1000:.1f} ms" if rtt is not None else "--"
+            rate_text = self.font.render(f"Rate: {publish_rate:.0f} Hz  RTT: {rtt_text}", True, (255, 255, 255))
+            self.screen.blit(rate_text, (400, 10))
+
         # 顯示錯誤訊息（若有）
         if connection_error:
             error_text = self.font.render(f"Error: {connection_error}", True, (255, 0, 0))
@@ -66,4 +97,25 @@ class UI:
         wheel_speed_text = self.font.render(f"Wheel Speed: {wheel_speed}", True, (255, 255, 255))
         self.screen.blit(wheel_speed_text, (10, 430))
 
+        if profiling:
+            profiling_text = self.font.render("PROFILING (F9 to stop)", True, (255, 200, 0))
+            self.screen.blit(profiling_text, (self.screen.get_width() - profiling_text.get_width() - 10, 10))
+
+        # 遙測圖（G 開關），放在右半邊
+        if telemetry:
+            width, height = self.screen.get_size()
+            telemetry.draw(self.screen, (width // 2, 190, width // 2 - 10, height - 200))
+
+        # 每個 frame 的耗時（F10 開關）
+        if frame_times:
+            self.draw_frame_times(frame_times)
+
         pygame.display.flip()
+
+    def draw_frame_times(self, frame_times):
+        x = self.screen.get_width() - 260
+        y = 40
+        for section in ("frame", "events", "joystick", "publish", "draw"):
+            text = self.font.render(f"{section:>8}: {frame_times[section] * 1000:6.2f} ms", True, (0, 255, 0))
+            self.screen.blit(text, (x, y))
+            y += 26
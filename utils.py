@@ -1,3 +1,6 @@
+import csv
+import time
+
 def map_trigger_value(value):
     return int((value + 1) * 15) if -1 <= value <= 1 else 0
 
@@ -13,4 +16,65 @@ def angle_limit(value):
         value = 30.0
     elif value <= 0.0:
         value = 0.0
-    return value
\ No newline at end of file
+    return value
+
+def parse_range(value, default):
+    """把 "start-end" 轉成 (start, end)，格式錯誤時回傳 default"""
+    try:
+        parts = value.split("-")
+        return (int(parts[0]), int(parts[1]))
+    except (AttributeError, IndexError, ValueError):
+        return default
+
+def read_global_params(filename="config.csv"):
+    """回傳 config.csv 中 global 列的 {param: value1}（字串）"""
+    params = {}
+    with open(filename, newline='') as f:
+        for row in csv.DictReader(f):
+            if row["type"] == "global":
+                params[row["param"]] = row["value1"]
+    return params
+
+def topic_config(params):
+    """由 global 參數取出 rosbridge port、手臂/前後輪 topic 與 cmd 範圍（batch_replay、sim_robot 共用）"""
+    return {
+        "rosbridge_port": int(params.get("rosbridge_port") or 9090),
+        "arm_topic": params.get("arm_topic") or "/robot_arm",
+        "front_wheel_topic": params.get("front_wheel_topic") or "/car_C_front_wheel",
+        "rear_wheel_topic": params.get("rear_wheel_topic") or "/car_C_rear_wheel",
+        "front_wheel_range": parse_range(params.get("front_wheel_range"), (0, 2)),
+        "rear_wheel_range": parse_range(params.get("rear_wheel_range"), (2, 4)),
+    }
+
+def load_recording(filename):
+    """
+    讀取 joystick_recording.csv，回傳 [(timestamp, [frontLeft, frontRight, rearLeft, rearRight]), ...]
+    """
+    samples = []
+    with open(filename, mode="r", newline="") as f:
+        reader = csv.DictReader(f)
+        for entry in reader:
+            speed = [float(entry["frontLeft"]), float(entry["frontRight"]),
+                     float(entry["rearLeft"]), float(entry["rearRight"])]
+            samples.append((float(entry["timestamp"]), speed))
+    return samples
+
+
+class StartupTimer:
+    """記錄啟動各階段花費的時間"""
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self._last = self.start
+        self.stages = []
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def report(self):
+        parts = ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in self.stages)
+        return f"startup {(self._last - self.start) * 1000:.0f}ms ({parts})"
@@ -1,34 +1,118 @@
 # ws_client.py
 import json
-import websocket
+import threading
+import time
+from log import get_logger
+
+logger = get_logger(__name__)
+
+# 用來量測往返時間 (RTT) 的 service，rosbridge 即使找不到 service 也會回覆 service_response
+PING_SERVICE = "/rosapi/get_time"
 
 class RosbridgeClient:
-    def __init__(self, rosbridge_port=9090):
+    def __init__(self, rosbridge_port=9090, ping_timeout=2.0, smoothing=0.2):
         self.rosbridge_port = rosbridge_port
         self.rosbridge_ip = ""
         self.ws = None
 
+        # 連線品質量測
+        self.ping_timeout = ping_timeout
+        self.smoothing = smoothing
+        self.rtt = None          # RTT 的指數移動平均（秒）
+        self.send_time = 0.0     # ws.send 花費時間的指數移動平均（秒），送出端塞車時會變大
+        self._pending_pings = {}  # ping id -> 送出時間
+        self._ping_count = 0
+        self._reader = None
+
     def connect(self, ip):
         self.rosbridge_ip = ip
         self.ws_url = f"ws://{ip}:{self.rosbridge_port}"
+        # 延後到真正連線時才載入 websocket，加快程式啟動
+        import websocket
         try:
             self.ws = websocket.create_connection(self.ws_url, timeout=3)
-            print(f"Connected to rosbridge via websocket at {self.ws_url}")
-            return True
+            logger.info("Connected to rosbridge via websocket at %s", self.ws_url)
         except Exception as e:
             self.ws = None
-            print(f"Failed to connect to rosbridge at {self.ws_url}: {e}")
+            logger.error("Failed to connect to rosbridge at %s: %s", self.ws_url, e)
             return False
+        self.rtt = None
+        self.send_time = 0.0
+        self._pending_pings = {}
+        self._reader = threading.Thread(target=self._read_loop, args=(self.ws,), name="rosbridge-reader", daemon=True)
+        self._reader.start()
+        return True
 
     def disconnect(self):
         if self.ws:
             try:
                 self.ws.close()
-                print("Disconnected from rosbridge.")
+                logger.info("Disconnected from rosbridge.")
             except Exception as e:
-                print(f"Error closing websocket: {e}")
+                logger.warning("Error closing websocket: %s", e)
         self.ws = None
 
+    def _read_loop(self, ws):
+        """背景執行緒：讀取 rosbridge 回覆，計算 ping 的往返時間"""
+        import websocket
+        while self.ws is ws:
+            try:
+                data = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except Exception:
+                break
+            received = time.perf_counter()
+            try:
+                message = json.loads(data)
+            except (TypeError, ValueError):
+                continue
+            sent = self._pending_pings.pop(message.get("id"), None)
+            if sent is not None:
+                self._record_rtt(received - sent)
+
+    def _record_rtt(self, rtt):
+        if self.rtt is None:
+            self.rtt = rtt
+        else:
+            self.rtt += self.smoothing * (rtt - self.rtt)
+
+    def _send(self, payload):
+        start = time.perf_counter()
+        self.ws.send(json.dumps(payload))
+        self.send_time += self.smoothing * (time.perf_counter() - start - self.send_time)
+
+    def send_ping(self):
+        """送出一個 service call，回覆到達時更新 RTT"""
+        if not self.ws:
+            return
+        self._ping_count += 1
+        ping_id = f"ping:{self._ping_count}"
+        now = time.perf_counter()
+        # 逾時未回覆的 ping 當成一次很慢的 RTT
+        for old_id, sent in list(self._pending_pings.items()):
+            if now - sent > self.ping_timeout:
+                if self._pending_pings.pop(old_id, None) is not None:
+                    self._record_rtt(now - sent)
+        self._pending_pings[ping_id] = now
+        try:
+            self._send({"op": "call_service", "id": ping_id, "service": PING_SERVICE})
+        except Exception as e:
+            self._pending_pings.pop(ping_id, None)
+            logger.warning("Failed to send ping: %s", e)
+
+    def backlog(self):
+        """尚未收到回覆的 ping 數量"""
+        return len(self._pending_pings)
+
+    def latency(self):
+        """目前估計的延遲（秒）：RTT 平均，若有更久還沒回覆的 ping 則以其等待時間為準"""
+        now = time.perf_counter()
+        oldest = max((now - sent for sent in list(self._pending_pings.values())), default=0.0)
+        if self.rtt is None:
+            return oldest or None
+        return max(self.rtt, oldest)
+
     def advertise_topic(self, topic, msg_type):
         if not self.ws:
             return
@@ -38,22 +122,55 @@ class RosbridgeClient:
             "type": msg_type
         }
         try:
-            self.ws.send(json.dumps(advertise_msg))
+            self._send(advertise_msg)
             # print(f"Advertised topic {topic} with type {msg_type}")
         except Exception as e:
-            print(f"Failed to advertise topic {topic}: {e}")
+            logger.warning("Failed to advertise topic %s: %s", topic, e)
 
     def publish(self, topic, msg):
+        """送出訊息，成功回傳 True"""
         if not self.ws:
-            print("Websocket connection not established.")
-            return
+            logger.warning("Websocket connection not established.")
+            return False
         publish_msg = {
             "op": "publish",
             "topic": topic,
             "msg": msg
         }
         try:
-            self.ws.send(json.dumps(publish_msg))
+            self._send(publish_msg)
             # print(f"Published to {topic}")
+            return True
         except Exception as e:
-            print(f"Failed to publish on {topic}: {e}")
+            logger.warning("Failed to publish on %s: %s", topic, e)
+            return False
+
+
+def publish_wheel(ws_client, cmd, front_topic, rear_topic, front_range, rear_range):
+    # 建立後輪與前輪的完整訊息（std_msgs/Float32MultiArray）
+    rear_msg = {
+        "layout": {
+            "dim": [{
+                "label": "rear_wheels",
+                "size": front_range[1] - front_range[0],  # 可依實際需求調整
+                "stride": front_range[1] - front_range[0]
+            }],
+            "data_offset": 0
+        },
+        "data": cmd[rear_range[0]:rear_range[1]]
+    }
+    front_msg = {
+        "layout": {
+            "dim": [{
+                "label": "front_wheels",
+                "size": rear_range[1] - rear_range[0],
+                "stride": rear_range[1] - rear_range[0]
+            }],
+            "data_offset": 0
+        },
+        "data": cmd[front_range[0]:front_range[1]]
+    }
+
+    rear_ok = ws_client.publish(rear_topic, rear_msg)
+    front_ok = ws_client.publish(front_topic, front_msg)
+    return rear_ok and front_ok